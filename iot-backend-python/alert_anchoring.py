@@ -0,0 +1,491 @@
+# Batched Merkle-root anchoring of alerts for the IoT Water Quality Monitoring Backend - SIH 2025
+# Each alert payload is hashed, hashes are collected into one Merkle tree per time window,
+# and only the window's root is submitted for on-chain logging (SmartHealthContracts).
+# Any single alert can then be proven part of an anchored root with an O(log n) proof.
+#
+# Hashing: SHA-256 over canonical JSON (sorted keys, no whitespace). Leaves and inner nodes
+# are domain separated (0x00 / 0x01 prefixes); an unpaired node is promoted to the next level.
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Closer retry backoff after a failed anchoring attempt (seconds, doubling)
+RETRY_INITIAL_S = 1
+RETRY_MAX_S = 300
+
+def alert_hash(payload):
+    """SHA-256 hex digest of an alert payload's canonical JSON (ignores any alert_id field)"""
+    data = {k: v for k, v in payload.items() if k != "alert_id"}
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _leaf(digest_hex):
+    return hashlib.sha256(b"\x00" + bytes.fromhex(digest_hex)).digest()
+
+def _node(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def build_levels(alert_hashes):
+    """All tree levels, leaves first and root last"""
+    level = [_leaf(h) for h in alert_hashes]
+    levels = [level]
+    while len(level) > 1:
+        level = [
+            _node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(level)
+    return levels
+
+def inclusion_proof(levels, index):
+    """Sibling hashes from leaf to root: one entry per level, O(log n)"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"side": "left" if sibling < index else "right", "hash": level[sibling].hex()})
+        index //= 2
+    return proof
+
+def _last_line(path):
+    """Last line of a text file without reading the whole file (None if empty or missing)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position, chunk = end, b""
+        while position > 0 and chunk.rstrip(b"\n").count(b"\n") == 0:
+            position = max(0, position - 4096)
+            f.seek(position)
+            chunk = f.read(end - position)
+    lines = chunk.rstrip(b"\n").split(b"\n")
+    return lines[-1].decode("utf-8") if lines[-1] else None
+
+def verify_proof(alert_hash_hex, proof, root_hex):
+    """Check that an alert hash is included under a Merkle root"""
+    current = _leaf(alert_hash_hex)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        current = _node(sibling, current) if step["side"] == "left" else _node(current, sibling)
+    return current.hex() == root_hex
+
+class FileRootSink:
+    """
+    Appends each window root to a JSONL file for later on-chain submission
+    Resubmitting the last submitted root returns its receipt instead of appending it again.
+    """
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        line = _last_line(path)
+        self.last = json.loads(line) if line else None
+
+    def submit(self, record):
+        receipt = {"sink": self.name, "path": self.path}
+        if self.last and (self.last["window_start"], self.last["root"]) == (record["window_start"], record["root"]):
+            return receipt
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.last = record
+        return receipt
+
+class LocalChainSink:
+    """
+    Local stand-in for the blockchain: an append-only, hash-linked ledger on disk
+    Each block carries one root in the shape of a SmartCommunityHealth.submitRecord call
+    (dataHash as 0x-prefixed bytes32). Resubmitting the root in the last block returns
+    that block's receipt instead of adding a duplicate block.
+    """
+
+    name = "local_chain"
+
+    def __init__(self, path):
+        self.path = path
+        self.height = 0
+        self.last_block_hash = "0" * 64
+        self.last_record = None
+        line = _last_line(path)
+        if line:
+            block = json.loads(line)
+            self.height = block["height"]
+            self.last_block_hash = block["block_hash"]
+            self.last_record = block["record"]
+
+    def _receipt(self):
+        return {"sink": self.name, "height": self.height, "tx_hash": self.last_block_hash}
+
+    def submit(self, record):
+        last = self.last_record
+        if last and (last["window_start"], last["root"]) == (record["window_start"], record["root"]):
+            return self._receipt()
+        block = {
+            "height": self.height + 1,
+            "prev_hash": self.last_block_hash,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "call": {
+                "function": "submitRecord",
+                "cid": f"iot-alerts/{record['window_start']}",
+                "dataHash": "0x" + record["root"]
+            },
+            "record": record
+        }
+        block["block_hash"] = hashlib.sha256(
+            json.dumps(block, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(block) + "\n")
+        self.height = block["height"]
+        self.last_block_hash = block["block_hash"]
+        self.last_record = record
+        return self._receipt()
+
+class AlertAnchor:
+    """
+    Accumulates alert hashes per time window and anchors one Merkle root per window
+    add() only appends a hash. Closed windows are handed to a background closer thread
+    (start()), so the alert send path never waits on disk or the sink. The closer first
+    stores the tree (all levels, one file per window) and indexes alert hash ->
+    (window, leaf) in an on-disk SQLite index, then submits the root and records the
+    receipt. A crash or sink failure in between leaves a stored, unsubmitted window that
+    is submitted on the next attempt; roots are submitted in window order, so the sink
+    only has to recognise its last root to stay idempotent. Memory holds only unanchored
+    alerts and an LRU of recent trees.
+    """
+
+    def __init__(self, storage_dir, window_s=60, sink="file", cache_windows=64, clock=time.time):
+        self.storage_dir = storage_dir
+        self.window_s = window_s
+        self.cache_windows = cache_windows
+        self.clock = clock
+        self.sink_name = sink
+        self._sink = None
+
+        self.pending_window = None
+        self.pending = []  # alert hashes in the open window
+        self._sealed = deque()  # (window start, hashes) closed but not yet stored
+        self._unanchored = {}  # alert hash -> (window start, leaf index) until stored
+        self._trees = OrderedDict()  # window start -> levels (LRU cache)
+        self._lock = threading.Lock()  # Guards the open window; held only briefly by add()
+        self._store_lock = threading.RLock()  # Serialises anchoring and index access
+        self._db = None
+
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.failures = 0  # Failed anchoring attempts (retried with backoff)
+        self.last_error = None
+
+    @property
+    def sink(self):
+        if self._sink is None:
+            if self.sink_name == "local_chain":
+                self._sink = LocalChainSink(os.path.join(self.storage_dir, "chain.jsonl"))
+            else:
+                self._sink = FileRootSink(os.path.join(self.storage_dir, "roots.jsonl"))
+        return self._sink
+
+    def _window_path(self, window_start):
+        return os.path.join(self.storage_dir, f"window_{window_start}.json")
+
+    def _index(self, create=False):
+        """
+        Open the SQLite index (None if nothing was ever anchored and create is False).
+        Window files missing from the index (written by older versions, or stored just
+        before a crash) are indexed on open, so startup never loads every tree.
+        """
+        if self._db is not None:
+            return self._db
+        path = os.path.join(self.storage_dir, "index.sqlite3")
+        if not create and not os.path.isdir(self.storage_dir):
+            return None
+        os.makedirs(self.storage_dir, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS windows (
+                window_start INTEGER PRIMARY KEY, anchor TEXT NOT NULL, receipt TEXT
+            );
+            CREATE TABLE IF NOT EXISTS alerts (
+                hash TEXT PRIMARY KEY, window_start INTEGER NOT NULL, leaf_index INTEGER NOT NULL
+            );
+        """)
+        if "receipt" not in {row[1] for row in db.execute("PRAGMA table_info(windows)")}:
+            db.execute("ALTER TABLE windows ADD COLUMN receipt TEXT")
+        indexed = {row[0] for row in db.execute("SELECT window_start FROM windows")}
+        for name in sorted(os.listdir(self.storage_dir)):
+            if not (name.startswith("window_") and name.endswith(".json")):
+                continue
+            if int(name[len("window_"):-len(".json")]) in indexed:
+                continue
+            with open(os.path.join(self.storage_dir, name), encoding="utf-8") as f:
+                tree = json.load(f)
+            self._index_window(db, tree["window_start"], tree["anchor"], tree["alerts"])
+        db.commit()
+        self._db = db
+        return db
+
+    @staticmethod
+    def _index_window(db, window_start, anchor, hashes):
+        # Trees written before receipts were recorded separately carry theirs in the anchor
+        receipt = anchor.get("receipt")
+        db.execute(
+            "INSERT OR REPLACE INTO windows VALUES (?, ?, ?)",
+            (window_start, json.dumps(anchor), json.dumps(receipt) if receipt else None)
+        )
+        db.executemany(
+            "INSERT OR REPLACE INTO alerts VALUES (?, ?, ?)",
+            ((h, window_start, i) for i, h in enumerate(hashes))
+        )
+
+    def add(self, payload):
+        """Hash an alert into the current window; returns its alert id (the hash)"""
+        digest = alert_hash(payload)
+        now = self.clock()
+        window_start = int(now // self.window_s) * self.window_s
+        with self._lock:
+            if window_start != self.pending_window:
+                if self.pending_window is not None:
+                    self._seal()
+                self._wake.set()  # The closer sleeps until this new window ends
+            self.pending_window = window_start
+            self._unanchored[digest] = (window_start, len(self.pending))
+            self.pending.append(digest)
+        return digest
+
+    def _seal(self):
+        """Hand the open window to the closer (caller holds _lock)"""
+        self._sealed.append((self.pending_window, self.pending))
+        self.pending_window, self.pending = None, []
+        self._wake.set()
+
+    def start(self):
+        """Anchor closed windows on a background thread; flushes the open window at exit"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, daemon=True, name="alert-anchor")
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the closer thread and anchor everything still open"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+        try:
+            self.flush()
+        except Exception as e:
+            # Stored windows are resubmitted on the next start; sealed ones are lost
+            logger.error(f"Could not anchor alerts on shutdown: {e}")
+        with self._store_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _run(self):
+        backoff = None  # Seconds until the next retry while anchoring keeps failing
+        while not self._stopping:
+            if backoff is not None:
+                wait = backoff
+            else:
+                with self._lock:
+                    wait = (self.pending_window + self.window_s - self.clock()
+                            if self.pending_window is not None else self.window_s)
+            self._wake.wait(max(0.0, wait))
+            self._wake.clear()
+            try:
+                self.close_expired()
+                backoff = None
+            except Exception as e:
+                # Windows stay sealed / unsubmitted and are retried; keep the closer alive
+                backoff = RETRY_INITIAL_S if backoff is None else min(backoff * 2, RETRY_MAX_S)
+                logger.error(f"Alert anchoring failed, retrying in {backoff}s: {e}")
+
+    def close_expired(self, now=None):
+        """Anchor the open window once its end time has passed; returns the last root record"""
+        now = now if now is not None else self.clock()
+        with self._lock:
+            if self.pending_window is not None and now >= self.pending_window + self.window_s:
+                self._seal()
+        return self._anchor_sealed()
+
+    def flush(self):
+        """Anchor the open window immediately (e.g. on shutdown)"""
+        with self._lock:
+            if self.pending_window is not None:
+                self._seal()
+        return self._anchor_sealed()
+
+    def _anchor_sealed(self):
+        """Store every sealed window, then submit every stored window without a receipt"""
+        try:
+            with self._store_lock:
+                while True:
+                    with self._lock:
+                        if not self._sealed:
+                            break
+                        window_start, hashes = self._sealed[0]
+                    self._store(window_start, hashes)
+                    with self._lock:
+                        self._sealed.popleft()
+                        for digest in hashes:
+                            self._unanchored.pop(digest, None)
+                return self._submit_stored()
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                self.last_error = str(e)
+            raise
+
+    def _store(self, window_start, hashes):
+        """Write and index a window's tree (idempotent, so a failed attempt can be retried)"""
+        levels = build_levels(hashes)
+        record = {
+            "window_start": window_start,
+            "window_end": window_start + self.window_s,
+            "root": levels[-1][0].hex(),
+            "alert_count": len(hashes)
+        }
+        db = self._index(create=True)
+        tree = {
+            "window_start": window_start,
+            "anchor": record,
+            "alerts": hashes,
+            "levels": [[node.hex() for node in level] for level in levels]
+        }
+        tmp_path = self._window_path(window_start) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tree, f)
+        os.replace(tmp_path, self._window_path(window_start))
+
+        with db:
+            self._index_window(db, window_start, record, hashes)
+        self._cache_tree(window_start, levels)
+
+    def _submit_stored(self):
+        """Submit stored roots in window order and record each receipt as it arrives"""
+        db = self._index()
+        if db is None:
+            return None
+        record = None
+        rows = db.execute(
+            "SELECT window_start, anchor FROM windows WHERE receipt IS NULL ORDER BY window_start"
+        ).fetchall()
+        for window_start, anchor in rows:
+            record = json.loads(anchor)
+            receipt = self.sink.submit(dict(record))
+            record["receipt"] = receipt
+            with db:
+                db.execute(
+                    "UPDATE windows SET anchor = ?, receipt = ? WHERE window_start = ?",
+                    (json.dumps(record), json.dumps(receipt), window_start)
+                )
+        return record
+
+    def _cache_tree(self, window_start, levels):
+        self._trees[window_start] = levels
+        self._trees.move_to_end(window_start)
+        while len(self._trees) > self.cache_windows:
+            self._trees.popitem(last=False)
+
+    def _levels(self, window_start):
+        levels = self._trees.get(window_start)
+        if levels is None:
+            with open(self._window_path(window_start), encoding="utf-8") as f:
+                tree = json.load(f)
+            levels = [[bytes.fromhex(node) for node in level] for level in tree["levels"]]
+            self._cache_tree(window_start, levels)
+        else:
+            self._trees.move_to_end(window_start)
+        return levels
+
+    def proof(self, alert_id):
+        """
+        Inclusion proof for an alert id, or None if unknown.
+        Alerts whose root has not been submitted yet return status "pending" without a proof.
+        """
+        with self._lock:
+            location = self._unanchored.get(alert_id)
+        with self._store_lock:
+            if location is None:
+                db = self._index()
+                row = db.execute(
+                    "SELECT alerts.window_start, leaf_index, anchor, receipt FROM alerts "
+                    "JOIN windows USING (window_start) WHERE hash = ?", (alert_id,)
+                ).fetchone() if db is not None else None
+                if row is None:
+                    return None
+                window_start, leaf_index, anchor, receipt = row
+                if receipt is not None:
+                    anchor = json.loads(anchor)
+                    levels = self._levels(window_start)
+            else:
+                window_start, receipt = location[0], None
+
+        if receipt is None:
+            return {
+                "status": "pending",
+                "alert_id": alert_id,
+                "window_start": window_start,
+                "anchors_at": window_start + self.window_s
+            }
+        return {
+            "status": "anchored",
+            "alert_id": alert_id,
+            "leaf_index": leaf_index,
+            "root": anchor["root"],
+            "proof": inclusion_proof(levels, leaf_index),
+            "anchor": anchor
+        }
+
+    def stats(self):
+        with self._store_lock:
+            db = self._index()
+            windows, unsubmitted, alerts = db.execute(
+                "SELECT (SELECT COUNT(*) FROM windows WHERE receipt IS NOT NULL), "
+                "(SELECT COUNT(*) FROM windows WHERE receipt IS NULL), (SELECT COUNT(*) FROM alerts)"
+            ).fetchone() if db is not None else (0, 0, 0)
+        with self._lock:
+            return {
+                "window_s": self.window_s,
+                "sink": self.sink_name,
+                "pending_alerts": len(self._unanchored),
+                "sealed_windows": len(self._sealed),
+                "unsubmitted_windows": unsubmitted,
+                "anchored_windows": windows,
+                "indexed_alerts": alerts,
+                "failures": self.failures,
+                "last_error": self.last_error
+            }
+
+    def recent_roots(self, limit=20):
+        with self._store_lock:
+            db = self._index()
+            if db is None:
+                return []
+            rows = db.execute(
+                "SELECT anchor FROM windows WHERE receipt IS NOT NULL "
+                "ORDER BY window_start DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(anchor) for anchor, in reversed(rows)]
@@ -0,0 +1,201 @@
+# Non-blocking structured logging for the IoT Water Quality Monitoring Backend - SIH 2025
+# Log calls on the transmission hot path only build a LogRecord and enqueue it. Formatting
+# (JSON) and I/O happen on a QueueListener thread that writes records in batches.
+#
+# Records can carry a category (logger.info(..., extra={"category": "transmission"})).
+# Categories can be sampled and rate limited before they are enqueued, so suppressed
+# records cost almost nothing. Warnings and errors outside a limited category always pass.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Per-category limits: "sample" keeps that fraction of records, "rate_per_s" caps
+# throughput with a token bucket (burst of one second's worth)
+DEFAULT_CATEGORY_LIMITS = {
+    "transmission": {"sample": 0.1, "rate_per_s": 100},
+    "alert": {"rate_per_s": 50},
+    "health": {"rate_per_s": 50}
+}
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class CategoryFilter(logging.Filter):
+    """Samples and rate limits records per category, counting what it suppresses"""
+
+    def __init__(self, limits=None):
+        super().__init__()
+        self.limits = dict(DEFAULT_CATEGORY_LIMITS if limits is None else limits)
+        self.suppressed = {}
+        self._buckets = {}  # category -> [tokens, last refill time]
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        category = getattr(record, "category", None)
+        limit = self.limits.get(category)
+        if limit is None:
+            return True
+
+        sample = limit.get("sample")
+        if sample is not None and self._rng.random() >= sample:
+            self._suppress(category)
+            return False
+
+        rate = limit.get("rate_per_s")
+        if rate is not None:
+            with self._lock:
+                now = time.monotonic()
+                bucket = self._buckets.setdefault(category, [rate, now])
+                bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                if bucket[0] < 1:
+                    self.suppressed[category] = self.suppressed.get(category, 0) + 1
+                    return False
+                bucket[0] -= 1
+        return True
+
+    def _suppress(self, category):
+        with self._lock:
+            self.suppressed[category] = self.suppressed.get(category, 0) + 1
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks or formats on the caller's thread
+    Records are passed through as-is (same process, no pickling needed) and dropped
+    with a count when the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """Buffers formatted records and writes them to the stream in batches"""
+
+    def __init__(self, stream=None, batch_size=100):
+        super().__init__(stream)
+        self.batch_size = batch_size
+        self.buffer = []
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                self.stream.write("\n".join(self.buffer) + "\n")
+                self.buffer = []
+            super().flush()
+
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes partial batches whenever the queue goes idle"""
+
+    def __init__(self, log_queue, *handlers, flush_interval=0.5):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_handlers()
+
+    def enqueue_sentinel(self):
+        # Blocking put so stop() still works when the queue is full
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+        self._flush_handlers()
+
+    def _flush_handlers(self):
+        for handler in self.handlers:
+            handler.flush()
+
+class AsyncLoggingPipeline:
+    """Handle on the running pipeline, for stats and shutdown"""
+
+    def __init__(self, log_queue, queue_handler, listener, category_filter):
+        self.queue = log_queue
+        self.queue_handler = queue_handler
+        self.listener = listener
+        self.category_filter = category_filter
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "dropped_queue_full": self.queue_handler.dropped,
+            "suppressed_by_category": dict(self.category_filter.suppressed)
+        }
+
+    def stop(self):
+        """Drain the queue and flush buffered records"""
+        self.listener.stop()
+
+def setup_logging(level=logging.INFO, stream=None, category_limits=None,
+                  batch_size=100, flush_interval=0.5, queue_size=10000):
+    """Route all logging through a bounded queue to a batching JSON writer thread"""
+    log_queue = queue.Queue(queue_size)
+
+    writer = BatchingStreamHandler(stream or sys.stderr, batch_size)
+    writer.setFormatter(JSONFormatter())
+
+    category_filter = CategoryFilter(category_limits)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(category_filter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = BatchingQueueListener(log_queue, writer, flush_interval=flush_interval)
+    listener.start()
+
+    pipeline = AsyncLoggingPipeline(log_queue, queue_handler, listener, category_filter)
+    atexit.register(pipeline.stop)
+    return pipeline
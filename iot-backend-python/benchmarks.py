@@ -0,0 +1,413 @@
+# Performance benchmarks for the IoT Water Quality Monitoring Backend - SIH 2025
+# Drives the Flask app in-process through the test client (no server needed):
+#
+# - micro:       generate_reading / assess_water_quality cost per call
+# - endpoints:   throughput and p50/p99 latency of /api/sensors/latest, /alerts, /historical
+# - transmitter: one transmission cycle against a local stub main backend
+# - startup:     module import plus first request, cold vs snapshot warm start
+# - scheduler:   fixed SEND_INTERVAL vs adaptive sampling over simulated hours of
+#                contamination plumes (uplink volume and alert detection latency)
+#
+# A multi-process load mode (--load-url) drives a running server over HTTP instead.
+# Results can be saved as JSON (--output) and diffed against an earlier run (--compare).
+#
+# Usage: python benchmarks.py --stations 1000 --output bench.json --compare baseline.json
+#        python benchmarks.py --load-url http://localhost:5000 --processes 4 --duration 10
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from alert_anchoring import AlertAnchor
+from metrics import percentile
+from sampling_scheduler import AdaptiveSamplingScheduler
+from scenario_injector import ScenarioInjector
+from simulation_engine import SimulationEngine, add_synthetic_stations
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SECTIONS = ("micro", "endpoints", "transmitter", "startup", "scheduler")
+
+def latency_summary(latencies, elapsed):
+    """Throughput and latency percentiles (milliseconds) for a list of request latencies"""
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3)
+    }
+
+def bench_micro(backend, number=2000):
+    """Per-call cost of reading generation and quality assessment"""
+    simulator = backend.get_simulator()
+    params = simulator.generate_reading("Guwahati")["parameters"]
+
+    results = {}
+    for name, func in (
+        ("generate_reading_simulated", lambda: simulator.generate_reading("Aizawl")),
+        ("generate_reading_real_data", lambda: simulator.generate_reading("Guwahati")),
+        ("assess_water_quality", lambda: simulator.assess_water_quality(params))
+    ):
+        best = min(timeit.repeat(func, number=number, repeat=3))
+        results[f"{name}_us"] = round(best / number * 1e6, 3)
+    return results
+
+def bench_endpoints(backend, requests_per_endpoint=200):
+    """Latency and throughput of the main read endpoints through the Flask test client"""
+    client = backend.app.test_client()
+    endpoints = {
+        "latest": ("/api/sensors/latest", requests_per_endpoint),
+        "alerts": ("/api/sensors/alerts", requests_per_endpoint),
+        # Historical generates 30 readings per call, so it gets fewer iterations
+        "historical": ("/api/sensors/historical/Guwahati", max(10, requests_per_endpoint // 10))
+    }
+
+    results = {}
+    for name, (path, count) in endpoints.items():
+        client.get(path)  # warm-up
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            request_started = time.perf_counter()
+            response = client.get(path)
+            latencies.append(time.perf_counter() - request_started)
+            assert response.status_code == 200, f"{path} returned {response.status_code}"
+        results[name] = latency_summary(latencies, time.perf_counter() - started)
+    return results
+
+class _StubBackendHandler(BaseHTTPRequestHandler):
+    """Accepts sensor uploads and alerts like the main Node.js backend would"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.received[self.path] = self.server.received.get(self.path, 0) + 1
+        body = b'{"success": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def bench_transmitter(backend, cycles=3):
+    """Full transmission cycles (generate, assess, POST) against a local stub backend"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubBackendHandler)
+    server.received = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Anchor alerts into a throwaway directory rather than the working tree
+    anchor_dir = tempfile.TemporaryDirectory()
+    saved = (backend.config.MAIN_BACKEND_URL, backend.config.TRANSMIT_ENABLED, backend.alert_anchor)
+    backend.config.MAIN_BACKEND_URL = f"http://127.0.0.1:{server.server_address[1]}"
+    backend.config.TRANSMIT_ENABLED = True
+    backend.alert_anchor = AlertAnchor(anchor_dir.name, backend.config.ANCHOR_WINDOW)
+    try:
+        stations = len(backend.get_simulator().regions)
+        timings = []
+        for _ in range(cycles):
+            started = time.perf_counter()
+            backend.transmitter.run_cycle()
+            timings.append(time.perf_counter() - started)
+    finally:
+        backend.alert_anchor.stop()
+        backend.config.MAIN_BACKEND_URL, backend.config.TRANSMIT_ENABLED, backend.alert_anchor = saved
+        server.shutdown()
+        server.server_close()
+        anchor_dir.cleanup()
+
+    best = min(timings)
+    return {
+        "stations": stations,
+        "cycle_s": round(best, 4),
+        "readings_per_s": round(stations / best, 1),
+        "uploads_received": server.received.get(backend.config.SENSOR_UPLOAD_ENDPOINT, 0),
+        "alerts_received": server.received.get(backend.config.ALERT_ENDPOINT, 0)
+    }
+
+def bench_import(repeat=3):
+    """Time a fresh-interpreter import of the backend module (best of `repeat`)"""
+    code = (
+        "import time; t = time.perf_counter(); "
+        "import enhanced_iot_backend; "
+        "print(time.perf_counter() - t)"
+    )
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return min(timings)
+
+def bench_startup(backend, total_stations, snapshot_path):
+    """Time cold and warm startup (warm_up + first /api/sensors/latest request)"""
+    client = backend.app.test_client()
+
+    # Cold start: fetch data and generate a reading for every station
+    backend.reset_simulator()
+    start = time.perf_counter()
+    simulator = backend.warm_up()
+    add_synthetic_stations(simulator, total_stations)
+    ready = time.perf_counter()
+    response = client.get('/api/sensors/latest')
+    cold_first = time.perf_counter()
+    assert response.status_code == 200
+
+    simulator.save_snapshot(snapshot_path)
+
+    # Warm start: load the precomputed state written above
+    backend.reset_simulator()
+    start_warm = time.perf_counter()
+    backend.warm_up(snapshot_path)
+    ready_warm = time.perf_counter()
+    response = client.get('/api/sensors/latest')
+    warm_first = time.perf_counter()
+    assert response.status_code == 200
+    assert response.get_json()["count"] == total_stations
+
+    return {
+        "stations": total_stations,
+        "cold_warm_up_ms": round((ready - start) * 1000, 3),
+        "cold_first_request_ms": round((cold_first - start) * 1000, 3),
+        "warm_warm_up_ms": round((ready_warm - start_warm) * 1000, 3),
+        "warm_first_request_ms": round((warm_first - start_warm) * 1000, 3)
+    }
+
+def _plume_scenario(simulator, hours, plumes, seed):
+    """Dissolved oxygen crashes at random stations, each spreading 40 km for 15 minutes"""
+    rng = random.Random(seed)
+    regions = sorted(simulator.regions)
+    return {
+        "name": "benchmark_plumes",
+        "events": [
+            {
+                "id": f"plume_{i}",
+                "type": "spike",
+                "parameter": "dissolved_oxygen",
+                "set": 2.5,
+                "origin": rng.choice(regions),
+                "radius_km": 40,
+                "start_s": rng.uniform(0, hours * 3600 - 900),
+                "duration_s": 900
+            }
+            for i in range(plumes)
+        ]
+    }
+
+def _simulate_policy(simulator, scenario, adaptive, hours, seed):
+    """Run one sampling policy on a virtual clock; readings are identical across policies"""
+    clock = [0.0]
+    engine = SimulationEngine(simulator, seed)
+    epoch = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    scheduler = AdaptiveSamplingScheduler(adaptive=adaptive, clock=lambda: clock[0])
+    injector = ScenarioInjector(scenario, simulator, clock=lambda: clock[0])
+    scheduler.sync(simulator.regions)
+    injector.start()
+
+    uplinks = 0
+    for second in range(int(hours * 3600)):
+        clock[0] = float(second)
+        for region, due in scheduler.pop_due(second):
+            reading = injector.apply(engine.reading_at(region, epoch + timedelta(seconds=second)))
+            if reading is not None:
+                uplinks += 1
+                if reading["status"]["alert"]:
+                    injector.record_alert(reading, sent_at=second)
+            scheduler.observe(region, reading, due, second)
+
+    report = injector.report()
+    return {
+        "uplinks": uplinks,
+        "uplinks_per_station_hour": round(uplinks / len(simulator.regions) / hours, 1),
+        "neighbour_boosts": scheduler.boosts,
+        "stations_affected": report["stations_affected"],
+        "stations_alerted": report["stations_alerted"],
+        "alert_latency_s": report["alert_latency_s"]
+    }
+
+def bench_scheduler(backend, stations=500, hours=4, plumes=40, seed=7):
+    """Uplink volume and detection latency: fixed interval vs adaptive sampling"""
+    backend.reset_simulator()
+    simulator = backend.warm_up()
+    add_synthetic_stations(simulator, stations)
+    scenario = _plume_scenario(simulator, hours, plumes, seed)
+
+    results = {"stations": len(simulator.regions), "hours": hours, "plumes": plumes}
+    for name, adaptive in (("fixed", False), ("adaptive", True)):
+        results[name] = _simulate_policy(simulator, scenario, adaptive, hours, seed)
+    results["uplink_reduction_pct"] = round(
+        100 * (1 - results["adaptive"]["uplinks"] / results["fixed"]["uplinks"]), 1
+    )
+    results["regressions"] = _scheduler_regressions(results["fixed"], results["adaptive"])
+    return results
+
+def _scheduler_regressions(fixed, adaptive):
+    """Every metric where adaptive sampling does worse than the fixed loop"""
+    regressions = []
+    for name in ("p50", "p90", "p99", "max"):
+        before, after = fixed["alert_latency_s"][name], adaptive["alert_latency_s"][name]
+        if before is not None and (after is None or after > before):
+            regressions.append(f"alert_latency_s.{name}: {before} -> {after}")
+    if adaptive["stations_alerted"] < fixed["stations_alerted"]:
+        regressions.append(f"stations_alerted: {fixed['stations_alerted']} -> {adaptive['stations_alerted']}")
+    if adaptive["uplinks"] > fixed["uplinks"]:
+        regressions.append(f"uplinks: {fixed['uplinks']} -> {adaptive['uplinks']}")
+    return regressions
+
+def _load_worker(task):
+    """One load-generating process: round-robin over endpoints until the deadline"""
+    import requests
+
+    base_url, paths, duration = task
+    session = requests.Session()
+    latencies = {path: [] for path in paths}
+    errors = 0
+    deadline = time.perf_counter() + duration
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{base_url}{path}", timeout=10)
+            if response.status_code != 200:
+                errors += 1
+                continue
+        except requests.RequestException:
+            errors += 1
+            continue
+        latencies[path].append(time.perf_counter() - started)
+    return latencies, errors
+
+def run_load(base_url, processes, duration):
+    """Multi-process HTTP load against a running server"""
+    paths = ["/api/sensors/latest", "/api/sensors/alerts", "/api/sensors/historical/Guwahati"]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_load_worker, [(base_url.rstrip("/"), paths, duration)] * processes)
+
+    merged = {path: [] for path in paths}
+    errors = 0
+    for latencies, worker_errors in results:
+        errors += worker_errors
+        for path, values in latencies.items():
+            merged[path].extend(values)
+
+    report = {"processes": processes, "duration_s": duration, "errors": errors}
+    for path, values in merged.items():
+        if values:
+            report[path] = latency_summary(values, duration)
+    return report
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(current, baseline_path):
+    """Print per-metric change against an earlier results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old, new = _flatten(baseline["results"]), _flatten(current["results"])
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('commit')}):")
+    for name in sorted(new):
+        if name in old and old[name]:
+            change = (new[name] - old[name]) / old[name] * 100
+            print(f"  {name:<55} {old[name]:>12} -> {new[name]:>12} ({change:+.1f}%)")
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="IoT backend benchmarks and load tests")
+    parser.add_argument("--stations", type=int, default=100,
+                        help="Station count for endpoint and transmitter benchmarks")
+    parser.add_argument("--startup-stations", default="8,100,1000",
+                        help="Comma-separated station counts for the startup benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--scheduler-stations", type=int, default=500,
+                        help="Station count for the sampling scheduler benchmark")
+    parser.add_argument("--scheduler-hours", type=float, default=4,
+                        help="Simulated hours for the sampling scheduler benchmark")
+    parser.add_argument("--only", default=",".join(SECTIONS),
+                        help=f"Comma-separated sections to run ({', '.join(SECTIONS)})")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    parser.add_argument("--load-url", help="Run multi-process HTTP load against this server instead")
+    parser.add_argument("--processes", type=int, default=4, help="Load-generating processes")
+    parser.add_argument("--duration", type=float, default=10, help="Load test duration in seconds")
+    args = parser.parse_args()
+
+    if args.load_url:
+        results = {"load": run_load(args.load_url, args.processes, args.duration)}
+    else:
+        sys.path.insert(0, BACKEND_DIR)
+        import enhanced_iot_backend as backend
+        backend.configure_logging()
+        backend.logger.setLevel("ERROR")
+
+        sections = args.only.split(",")
+        results = {}
+        if "micro" in sections:
+            backend.warm_up()
+            results["micro"] = bench_micro(backend)
+        if "endpoints" in sections or "transmitter" in sections:
+            backend.reset_simulator()
+            add_synthetic_stations(backend.warm_up(), args.stations)
+            if "endpoints" in sections:
+                results["endpoints"] = bench_endpoints(backend, args.requests)
+            if "transmitter" in sections:
+                results["transmitter"] = bench_transmitter(backend)
+        if "startup" in sections:
+            startup = {"import_ms": round(bench_import() * 1000, 3)}
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                snapshot_path = os.path.join(tmp_dir, "snapshot.json")
+                for count in [int(n) for n in args.startup_stations.split(",")]:
+                    startup[f"stations_{count}"] = bench_startup(backend, count, snapshot_path)
+            results["startup"] = startup
+        if "scheduler" in sections:
+            results["scheduler"] = bench_scheduler(backend, args.scheduler_stations, args.scheduler_hours)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "stations": args.stations,
+        "results": results
+    }
+    print(json.dumps(report, indent=2))
+    for regression in results.get("scheduler", {}).get("regressions", []):
+        print(f"REGRESSION adaptive vs fixed sampling: {regression}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -3,23 +3,88 @@
 # Provides both simulated and real water quality data for Northeast India
 
 import json
+import os
 import time
 import random
 from datetime import datetime, timezone, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import requests
 import threading
 import logging
+import signal
+import sys
 import csv
 import io
+from collections import deque
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from simulation_engine import SimulationEngine, synthetic_stations
+from scenario_injector import ScenarioInjector, load_named_scenario, list_scenarios
+from sensor_health import SensorHealthTracker
+from metrics import REGISTRY, Counter, Gauge, Histogram, SamplingProfiler
+from async_logging import setup_logging
+from alert_anchoring import AlertAnchor
+from sampling_scheduler import AdaptiveSamplingScheduler
+from sharding import HashRing, partition_key
+
+# Logging: JSON records are formatted and written in batches on a background thread;
+# per-reading transmission logs are sampled and alerts are rate limited. Installed by
+# configure_logging() at startup, not at import, so importing the module leaves the
+# host process's handlers alone.
+log_pipeline = None
 logger = logging.getLogger(__name__)
 
 # Flask app initialization
 app = Flask(__name__)
 
+# Metrics exported on /metrics. Hot paths keep pre-bound children (metric.labels(...))
+HTTP_REQUEST_DURATION = Histogram(
+    "iot_http_request_duration_seconds", "API request latency by endpoint",
+    ("endpoint", "method", "status")
+)
+STAGE_DURATION = Histogram(
+    "iot_stage_duration_seconds", "Time spent in reading pipeline stages", ("stage",)
+)
+GENERATE_DURATION = STAGE_DURATION.labels("generate")
+ASSESS_DURATION = STAGE_DURATION.labels("assess")
+SERIALIZE_DURATION = STAGE_DURATION.labels("serialize")
+TRANSMIT_QUEUE_DEPTH = Gauge(
+    "iot_transmitter_queue_depth", "Readings still waiting to be sent in the current cycle"
+)
+TRANSMIT_DURATION = Histogram(
+    "iot_transmitter_send_duration_seconds", "Time to send one reading to the main backend"
+)
+TRANSMISSIONS = Counter(
+    "iot_transmissions_total", "Readings sent to the main backend by result", ("result",)
+)
+CACHE_REQUESTS = Counter(
+    "iot_cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+)
+REAL_DATA_CACHE_HIT = CACHE_REQUESTS.labels("real_data", "hit")
+REAL_DATA_CACHE_MISS = CACHE_REQUESTS.labels("real_data", "miss")
+TRANSMIT_SUCCESS = TRANSMISSIONS.labels("success")
+TRANSMIT_ERROR = TRANSMISSIONS.labels("error")
+ALERTS_SENT = Counter(
+    "iot_alerts_total", "Alerts sent by level and region", ("level", "region")
+)
+
+# Sampling profiler, off until started through /api/profiler/start
+profiler = SamplingProfiler()
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_latency(response):
+    started = g.get("request_started")
+    if started is not None:
+        # Label by route template, not raw path, so per-region URLs share one series
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUEST_DURATION.labels(endpoint, request.method, response.status_code).observe(
+            time.perf_counter() - started
+        )
+    return response
+
 class RealDataFetcher:
     """
     Fetches real water quality data from Indian government APIs and open datasets
@@ -115,7 +180,9 @@ class RealDataFetcher:
     def get_real_data_for_region(self, region):
         """Get real/cached data for a specific region"""
         if region in self.real_data_cache:
+            REAL_DATA_CACHE_HIT.inc()
             return self.real_data_cache[region]
+        REAL_DATA_CACHE_MISS.inc()
         return None
     
     def should_fetch_new_data(self):
@@ -124,13 +191,16 @@ class RealDataFetcher:
             return True
         return (datetime.now() - self.last_fetch).seconds > self.fetch_interval
 
+# Snapshot file format version (bump when the saved state layout changes)
+SNAPSHOT_VERSION = 1
+
 class EnhancedWaterQualitySimulator:
     """
     Enhanced simulator that combines real data with simulated data
     Provides realistic water quality data for Northeast India regions
     """
     
-    def __init__(self):
+    def __init__(self, initialize=True):
         # Initialize real data fetcher
         self.real_data_fetcher = RealDataFetcher()
         
@@ -157,17 +227,27 @@ class EnhancedWaterQualitySimulator:
             "chlorine": {"min": 0, "max": 4, "ideal": 0.5, "unit": "mg/L"}
         }
         
-        # Store latest readings for each region
+        # Store latest readings for each region; sensor_status is owned by the health tracker
         self.latest_readings = {}
-        self.sensor_status = {}
+        self.health = SensorHealthTracker(
+            limits={param: (ranges["min"], ranges["max"]) for param, ranges in self.parameters.items()}
+        )
+        self.sensor_status = self.health.status
+        self.loaded_from_snapshot = False
+        self.regions_version = 0  # Bumped when stations are added or removed
+        self.regions_lock = threading.RLock()  # Guards station membership against rebalancing
+        
+        # Snapshot warm starts restore state themselves (see from_snapshot)
+        if not initialize:
+            return
         
         # Initialize by fetching real data
         self._initialize_data()
         
         # Initialize sensors for each region
         for region in self.regions:
-            self.sensor_status[region] = "online"
-            self.latest_readings[region] = self.generate_reading(region)
+            self.health.register(region, self._river_of(region))
+            self.record_reading(region, self.generate_reading(region))
     
     def _initialize_data(self):
         """Initialize with real data where available"""
@@ -179,8 +259,15 @@ class EnhancedWaterQualitySimulator:
         except Exception as e:
             logger.warning(f"Could not fetch real data, using simulation only: {e}")
     
-    def generate_reading(self, region):
-        """Generate water quality reading combining real and simulated data"""
+    def generate_reading(self, region, timestamp=None, rng=random):
+        """
+        Generate water quality reading combining real and simulated data.
+        Pass a timestamp and a seeded random.Random to make the reading reproducible.
+        """
+        started = time.perf_counter()
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+        
         region_info = self.regions[region]
         data_source = region_info["data_source"]
         
@@ -193,7 +280,7 @@ class EnhancedWaterQualitySimulator:
                 "longitude": region_info["lon"],
                 "station_info": self.real_data_fetcher.ne_stations.get(region, {})
             },
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": timestamp.isoformat(),
             "data_source": data_source,
             "parameters": {}
         }
@@ -208,7 +295,7 @@ class EnhancedWaterQualitySimulator:
             if real_data and param in real_data:
                 # Use real data with some variation to simulate current conditions
                 base_value = real_data[param]
-                variation = random.uniform(-0.1, 0.1) * base_value
+                variation = rng.uniform(-0.1, 0.1) * base_value
                 reading["parameters"][param] = {
                     "value": round(max(ranges["min"], min(ranges["max"], base_value + variation)), 2),
                     "unit": ranges["unit"],
@@ -220,16 +307,16 @@ class EnhancedWaterQualitySimulator:
                 
                 if param == "ph":
                     base_value = ranges["ideal"] - (pollution_factor * 0.5)
-                    value = base_value + random.uniform(-0.3, 0.3)
+                    value = base_value + rng.uniform(-0.3, 0.3)
                 elif param == "turbidity":
                     base_value = ranges["ideal"] * (1 + pollution_factor * 3)
-                    value = base_value + random.uniform(-2, 5)
+                    value = base_value + rng.uniform(-2, 5)
                 elif param == "dissolved_oxygen":
                     base_value = ranges["ideal"] * (1 - pollution_factor * 0.3)
-                    value = base_value + random.uniform(-1, 1)
+                    value = base_value + rng.uniform(-1, 1)
                 else:
                     base_value = ranges["ideal"] * (1 + pollution_factor * 0.5)
-                    value = base_value + random.uniform(-ranges["ideal"]*0.1, ranges["ideal"]*0.1)
+                    value = base_value + rng.uniform(-ranges["ideal"]*0.1, ranges["ideal"]*0.1)
                 
                 reading["parameters"][param] = {
                     "value": round(max(ranges["min"], min(ranges["max"], value)), 2),
@@ -244,14 +331,16 @@ class EnhancedWaterQualitySimulator:
         reading["metadata"] = {
             "collection_method": "IoT_sensor" if data_source == "simulated" else "government_monitoring",
             "quality_score": reading["status"]["score"],
-            "last_calibration": (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
+            "last_calibration": (timestamp - timedelta(days=rng.randint(1, 30))).isoformat(),
             "sensor_health": "good"
         }
         
+        GENERATE_DURATION.observe(time.perf_counter() - started)
         return reading
     
     def assess_water_quality(self, params):
         """Enhanced water quality assessment"""
+        started = time.perf_counter()
         score = 0
         total_params = len(params)
         critical_issues = []
@@ -306,6 +395,7 @@ class EnhancedWaterQualitySimulator:
         status["critical_issues"] = critical_issues
         status["recommendations"] = self._get_recommendations(quality_score, critical_issues)
         
+        ASSESS_DURATION.observe(time.perf_counter() - started)
         return status
     
     def _get_recommendations(self, score, issues):
@@ -337,9 +427,142 @@ class EnhancedWaterQualitySimulator:
                 logger.info("Real data refreshed successfully")
                 return True
         return False
+    
+    def add_region(self, region, lat, lon, pollution_factor=0.3, data_source="simulated"):
+        """Register an additional monitoring station and take its first reading"""
+        with self.regions_lock:
+            self.regions[region] = {
+                "lat": lat, "lon": lon,
+                "pollution_factor": pollution_factor,
+                "data_source": data_source
+            }
+            self.health.register(region, self._river_of(region))
+            self.record_reading(region, self.generate_reading(region))
+            self.regions_version += 1
+    
+    def remove_region(self, region):
+        """Stop simulating a station and drop its readings and health state"""
+        with self.regions_lock:
+            if self.regions.pop(region, None) is None:
+                return
+            self.latest_readings.pop(region, None)
+            self.health.unregister(region)
+            self.regions_version += 1
+    
+    def _river_of(self, region):
+        """River a station samples, used to find neighbouring stations for drift checks"""
+        return self.real_data_fetcher.ne_stations.get(region, {}).get("river")
+    
+    def record_reading(self, region, reading):
+        """
+        Store a reading as the region's latest and feed it to the health tracker.
+        Readings for stations this node no longer serves (moved by a rebalance) are dropped.
+        """
+        with self.regions_lock:
+            if region not in self.regions:
+                return False
+            self.health.observe(reading)
+            self.latest_readings[region] = reading
+            return True
+    
+    def get_state(self):
+        """Return simulator state as a JSON-serialisable dict (snapshots, worker processes)"""
+        last_fetch = self.real_data_fetcher.last_fetch
+        return {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": datetime.now(timezone.utc).isoformat(),
+            "regions": self.regions,
+            "real_data_cache": self.real_data_fetcher.real_data_cache,
+            "last_fetch": last_fetch.isoformat() if last_fetch else None,
+            "sensor_status": self.sensor_status,
+            "latest_readings": self.latest_readings
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """Build a simulator from get_state() output without fetching or generating data"""
+        if state.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {state.get('version')}")
+        
+        sim = cls(initialize=False)
+        sim.regions = state["regions"]
+        sim.latest_readings = state["latest_readings"]
+        
+        # Liveness is recomputed from live data rather than restored from the saved sensor_status
+        for region in sim.regions:
+            metadata = sim.latest_readings.get(region, {}).get("metadata", {})
+            sim.health.register(region, sim._river_of(region), metadata.get("last_calibration"))
+        sim.real_data_fetcher.real_data_cache = state["real_data_cache"]
+        if state["last_fetch"]:
+            sim.real_data_fetcher.last_fetch = datetime.fromisoformat(state["last_fetch"])
+        return sim
+    
+    def save_snapshot(self, path):
+        """Persist simulator state to disk so later workers can warm start from it"""
+        # Write to a temp file first so a crash never leaves a half-written snapshot
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.get_state(), f)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved simulator snapshot with {len(self.regions)} stations to {path}")
+    
+    @classmethod
+    def from_snapshot(cls, path):
+        """Build a simulator from a saved snapshot file"""
+        with open(path, encoding="utf-8") as f:
+            sim = cls.from_state(json.load(f))
+        sim.loaded_from_snapshot = True
+        
+        logger.info(f"Warm started simulator from snapshot {path} ({len(sim.regions)} stations)")
+        return sim
+
+# Global enhanced simulator instance. Construction fetches data and generates
+# readings for every station, so it is deferred until warm_up() or first use.
+_simulator = None
+_simulator_lock = threading.Lock()
+
+def get_simulator():
+    """Return the shared simulator, building it on first use"""
+    global _simulator
+    if _simulator is None:
+        with _simulator_lock:
+            if _simulator is None:
+                _simulator = EnhancedWaterQualitySimulator()
+    return _simulator
+
+def warm_up(snapshot_path=None):
+    """
+    Build the shared simulator ahead of the first request.
+    Loads precomputed state from snapshot_path when it exists, otherwise starts cold.
+    """
+    global _simulator
+    with _simulator_lock:
+        if _simulator is None:
+            if snapshot_path and os.path.exists(snapshot_path):
+                try:
+                    _simulator = EnhancedWaterQualitySimulator.from_snapshot(snapshot_path)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Could not load snapshot {snapshot_path}, starting cold: {e}")
+            if _simulator is None:
+                _simulator = EnhancedWaterQualitySimulator()
+    return _simulator
+
+def configure_logging():
+    """Install the async logging pipeline once per process"""
+    global log_pipeline
+    if log_pipeline is None:
+        log_pipeline = setup_logging(level=logging.INFO)
+    return log_pipeline
 
-# Global enhanced simulator instance
-simulator = EnhancedWaterQualitySimulator()
+def is_ready():
+    """Check whether the shared simulator has been built"""
+    return _simulator is not None
+
+def reset_simulator():
+    """Drop the shared simulator so the next access rebuilds it (used by benchmarks)"""
+    global _simulator
+    with _simulator_lock:
+        _simulator = None
 
 # Configuration for main project integration
 class ProjectConfig:
@@ -356,11 +579,38 @@ class ProjectConfig:
     # Data sending interval (seconds)
     SEND_INTERVAL = 30  # Send data every 30 seconds
     
+    # Adaptive sampling: each station gets its own due time between these bounds, faster
+    # in alert or when volatile, slower when stable (False = every station every SEND_INTERVAL)
+    ADAPTIVE_SAMPLING = True
+    MIN_SEND_INTERVAL = 10
+    MAX_SEND_INTERVAL = 60
+    
+    # POST readings and alerts to MAIN_BACKEND_URL (False = log and simulate success)
+    TRANSMIT_ENABLED = False
+    
     # Data source preference
     PREFER_REAL_DATA = True
+    
+    # Precomputed simulator state used for warm starts
+    SNAPSHOT_PATH = "simulator_snapshot.json"
+    
+    # Alert anchoring: one Merkle root per window is submitted for blockchain logging
+    ANCHOR_DIR = "alert_anchors"
+    ANCHOR_WINDOW = 60  # seconds per Merkle tree
+    ANCHOR_SINK = "file"  # "file" (roots.jsonl) or "local_chain" (hash-linked stand-in ledger)
+    
+    # Sharding: total stations across all nodes (synthetic stations pad the 8 named ones).
+    # Each node only simulates the share a coordinator assigns it via POST /api/shard.
+    CLUSTER_STATIONS = 0
+    
+    # Under a multi-worker WSGI server only the worker holding this lock runs the transmitter
+    TRANSMITTER_LOCK = "transmitter.lock"
 
 config = ProjectConfig()
 
+# Alert anchoring (no disk access until the first anchored window or proof request)
+alert_anchor = AlertAnchor(config.ANCHOR_DIR, config.ANCHOR_WINDOW, config.ANCHOR_SINK)
+
 # Enhanced API Routes for IoT Backend
 
 @app.route('/api/status', methods=['GET'])
@@ -370,20 +620,75 @@ def get_system_status():
     Returns overall system status including data sources
     Used by: Main backend for health checks
     """
-    real_data_regions = sum(1 for region in simulator.regions.values() if region["data_source"] != "simulated")
+    simulator = get_simulator()
+    regions = simulator.regions.copy()  # Rebalancing may change membership meanwhile
+    
+    real_data_regions = sum(1 for region in regions.values() if region["data_source"] != "simulated")
+    
+    # Expire sensors that have gone silent since the last check. Liveness is only judged
+    # while this process samples the sensors; otherwise silence isn't a sensor failure.
+    if transmitter.running:
+        simulator.health.check()
+    sensor_health = simulator.health.summary()
     
     return jsonify({
         "status": "online",
-        "sensors_active": len([s for s in simulator.sensor_status.values() if s == "online"]),
+        "sensors_active": sensor_health["online"],
+        "liveness_monitored": transmitter.running,
         "total_sensors": len(simulator.sensor_status),
+        "sensor_health": sensor_health,
         "real_data_regions": real_data_regions,
-        "simulated_regions": len(simulator.regions) - real_data_regions,
+        "simulated_regions": len(regions) - real_data_regions,
         "last_update": datetime.now(timezone.utc).isoformat(),
-        "regions": list(simulator.regions.keys()),
-        "data_sources": {region: info["data_source"] for region, info in simulator.regions.items()},
+        "regions": list(regions.keys()),
+        "data_sources": {region: info["data_source"] for region, info in regions.items()},
         "api_version": "2.0_enhanced"
     })
 
+@app.route('/api/ready', methods=['GET'])
+def get_readiness():
+    """
+    GET /api/ready
+    Readiness probe - reports 503 until simulator state has been warmed up
+    Used by: Load balancers, gunicorn/container health checks
+    """
+    if not is_ready():
+        return jsonify({
+            "ready": False,
+            "status": "warming_up"
+        }), 503
+    
+    simulator = get_simulator()
+    return jsonify({
+        "ready": True,
+        "status": "ready",
+        "total_sensors": len(simulator.sensor_status),
+        "warm_start": simulator.loaded_from_snapshot
+    })
+
+@app.route('/api/snapshot', methods=['POST'])
+def save_snapshot():
+    """
+    POST /api/snapshot
+    Save current simulator state for snapshot-based warm starts
+    Used by: Deployment scripts before scaling out workers
+    """
+    simulator = get_simulator()
+    
+    try:
+        simulator.save_snapshot(config.SNAPSHOT_PATH)
+        return jsonify({
+            "success": True,
+            "path": config.SNAPSHOT_PATH,
+            "stations": len(simulator.regions),
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        })
+    except OSError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route('/api/sensors/latest', methods=['GET'])
 def get_latest_readings():
     """
@@ -391,11 +696,16 @@ def get_latest_readings():
     Returns latest readings from all sensors with enhanced metadata
     Used by: Frontend app, AIML module for current data
     """
+    simulator = get_simulator()
+    
     region = request.args.get('region')
     include_metadata = request.args.get('metadata', 'false').lower() == 'true'
     
-    if region and region in simulator.latest_readings:
-        data = simulator.latest_readings[region]
+    # Work on a copy: a shard rebalance may add or remove stations meanwhile
+    latest_readings = simulator.latest_readings.copy()
+    
+    if region and region in latest_readings:
+        data = latest_readings[region]
         if not include_metadata and 'metadata' in data:
             data = {k: v for k, v in data.items() if k != 'metadata'}
         
@@ -404,7 +714,7 @@ def get_latest_readings():
             "data": data
         })
     
-    all_data = simulator.latest_readings
+    all_data = latest_readings
     if not include_metadata:
         all_data = {
             region: {k: v for k, v in reading.items() if k != 'metadata'}
@@ -424,15 +734,24 @@ def get_region_reading(region):
     Get fresh reading for specific region with real-time data refresh
     Used by: Frontend for real-time updates, Government dashboard
     """
+    simulator = get_simulator()
+    
     if region not in simulator.regions:
+        owner = shard_owner(region)
+        if owner:
+            return jsonify({"success": False, "error": "Region is served by another node", "owner": owner}), 404
         return jsonify({"success": False, "error": "Region not found"}), 404
     
     # Refresh real data if needed
     simulator.refresh_real_data()
     
-    # Generate fresh reading
-    fresh_reading = simulator.generate_reading(region)
-    simulator.latest_readings[region] = fresh_reading
+    # Generate fresh reading (unless a rebalance moved the station away meanwhile)
+    with simulator.regions_lock:
+        if region not in simulator.regions:
+            return jsonify({"success": False, "error": "Region is served by another node",
+                            "owner": shard_owner(region)}), 404
+        fresh_reading = simulator.generate_reading(region)
+        simulator.record_reading(region, fresh_reading)
     
     return jsonify({
         "success": True,
@@ -447,10 +766,12 @@ def get_alerts():
     Returns enhanced alerts with recommendations and severity levels
     Used by: Government officials, Alert system
     """
+    simulator = get_simulator()
+    
     alerts = []
     severity_filter = request.args.get('severity')  # poor, fair, all
     
-    for region, reading in simulator.latest_readings.items():
+    for region, reading in simulator.latest_readings.copy().items():
         if reading["status"]["alert"]:
             if severity_filter and reading["status"]["level"] != severity_filter:
                 continue
@@ -481,6 +802,52 @@ def get_alerts():
         "generated_at": datetime.now(timezone.utc).isoformat()
     })
 
+@app.route('/api/sensors/health', methods=['GET'])
+def get_sensor_health():
+    """
+    GET /api/sensors/health
+    Per-sensor liveness, flatline and calibration drift details
+    Used by: Maintenance team, Government dashboard
+    """
+    simulator = get_simulator()
+    state_filter = request.args.get('state')  # online, stale, offline, stuck, drifting
+    
+    if transmitter.running:
+        simulator.health.check()
+    sensors = {}
+    for region in simulator.regions.copy():
+        report = simulator.health.sensor_report(region)
+        if state_filter and state_filter not in (report["status"], report["health"]):
+            continue
+        sensors[region] = report
+    
+    return jsonify({
+        "success": True,
+        "summary": simulator.health.summary(),
+        "liveness_monitored": transmitter.running,
+        "sensors": sensors,
+        "count": len(sensors)
+    })
+
+@app.route('/api/sensors/<region>/calibrate', methods=['POST'])
+def calibrate_sensor(region):
+    """
+    POST /api/sensors/<region>/calibrate
+    Record a sensor calibration and reset its drift baseline
+    Used by: Maintenance team after field calibration
+    """
+    simulator = get_simulator()
+    
+    if region not in simulator.regions:
+        return jsonify({"success": False, "error": "Region not found"}), 404
+    
+    simulator.health.calibrate(region)
+    return jsonify({
+        "success": True,
+        "region": region,
+        "health": simulator.health.sensor_report(region)
+    })
+
 @app.route('/api/sensors/historical/<region>', methods=['GET'])
 def get_historical_data(region):
     """
@@ -488,28 +855,18 @@ def get_historical_data(region):
     Get historical data for AIML training
     Used by: AIML module for pattern analysis
     """
+    simulator = get_simulator()
+    
     if region not in simulator.regions:
         return jsonify({"success": False, "error": "Region not found"}), 404
     
-    # Generate some historical data points for the last 30 days
-    historical_data = []
-    for days_back in range(30, 0, -1):
-        timestamp = datetime.now(timezone.utc) - timedelta(days=days_back)
-        
-        # Simulate historical reading
-        historical_reading = simulator.generate_reading(region)
-        historical_reading["timestamp"] = timestamp.isoformat()
-        
-        # Add some historical variation
-        for param in historical_reading["parameters"]:
-            original_value = historical_reading["parameters"][param]["value"]
-            # Add seasonal and weekly patterns
-            seasonal_factor = 0.1 * (1 + 0.3 * (days_back % 7) / 7)  # Weekly pattern
-            historical_reading["parameters"][param]["value"] = round(
-                original_value * (1 + seasonal_factor), 2
-            )
-        
-        historical_data.append(historical_reading)
+    # Generate daily historical data points for the last 30 days with diurnal,
+    # seasonal and monsoon patterns; pass ?seed=<int> for a reproducible series
+    engine = SimulationEngine(simulator, seed=request.args.get('seed', type=int))
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    historical_data = engine.series(
+        region, now - timedelta(days=30), now - timedelta(days=1), timedelta(days=1)
+    )
     
     return jsonify({
         "success": True,
@@ -526,13 +883,16 @@ def refresh_data_sources():
     Manually refresh data from external sources
     Used by: Development team, system maintenance
     """
+    simulator = get_simulator()
+    
     try:
         success = simulator.refresh_real_data()
         
         if success:
             # Update all readings with fresh data
-            for region in simulator.regions:
-                simulator.latest_readings[region] = simulator.generate_reading(region)
+            with simulator.regions_lock:
+                for region in simulator.regions:
+                    simulator.record_reading(region, simulator.generate_reading(region))
             
             return jsonify({
                 "success": True,
@@ -558,6 +918,8 @@ def manual_simulate():
     Enhanced manual simulation with options
     Used by: Development team for testing integration
     """
+    simulator = get_simulator()
+    
     data = request.json or {}
     region = data.get('region', 'all')
     force_alert = data.get('force_alert', False)
@@ -565,33 +927,38 @@ def manual_simulate():
     
     try:
         if region == 'all':
-            for reg in simulator.regions:
-                reading = simulator.generate_reading(reg)
-                
-                # Force alert if requested
-                if force_alert:
-                    reading["status"]["alert"] = True
-                    reading["status"]["level"] = "poor"
-                    reading["status"]["score"] = 0.3
-                
-                simulator.latest_readings[reg] = reading
+            with simulator.regions_lock:
+                for reg in simulator.regions:
+                    reading = simulator.generate_reading(reg)
+                    
+                    # Force alert if requested
+                    if force_alert:
+                        reading["status"]["alert"] = True
+                        reading["status"]["level"] = "poor"
+                        reading["status"]["score"] = 0.3
+                    
+                    simulator.record_reading(reg, reading)
+                regions_updated = list(simulator.regions.keys())
             
             return jsonify({
                 "success": True,
                 "message": "All sensors updated",
-                "regions_updated": list(simulator.regions.keys())
+                "regions_updated": regions_updated
             })
             
         elif region in simulator.regions:
-            reading = simulator.generate_reading(region)
-            
-            if force_alert:
-                reading["status"]["alert"] = True
-                reading["status"]["level"] = "poor"
-                reading["status"]["score"] = 0.3
-                reading["status"]["critical_issues"] = ["Simulated critical condition"]
-            
-            simulator.latest_readings[region] = reading
+            with simulator.regions_lock:
+                if region not in simulator.regions:
+                    return jsonify({"success": False, "error": "Invalid region"}), 400
+                reading = simulator.generate_reading(region)
+                
+                if force_alert:
+                    reading["status"]["alert"] = True
+                    reading["status"]["level"] = "poor"
+                    reading["status"]["score"] = 0.3
+                    reading["status"]["critical_issues"] = ["Simulated critical condition"]
+                
+                simulator.record_reading(region, reading)
             
             return jsonify({
                 "success": True,
@@ -617,9 +984,16 @@ class EnhancedDataTransmitter:
     def __init__(self):
         self.running = False
         self.thread = None
-        self.transmission_log = []
+        self.transmission_log = deque(maxlen=100)  # Ring buffer of recent transmissions
         self.success_count = 0
         self.error_count = 0
+        self.injector = None  # Optional ScenarioInjector applied to generated readings
+        self.session = requests.Session()  # Reuses connections to the main backend
+        self.scheduler = AdaptiveSamplingScheduler(
+            config.SEND_INTERVAL, config.MIN_SEND_INTERVAL, config.MAX_SEND_INTERVAL
+        )
+        self._synced = None  # (simulator id, regions_version) the scheduler last synced with
+        self.cycle_lock = threading.Lock()  # Held for a pass; rebalancing waits for it
     
     def start(self):
         """Start automatic data transmission"""
@@ -627,6 +1001,7 @@ class EnhancedDataTransmitter:
             self.running = True
             self.thread = threading.Thread(target=self._send_data_loop, daemon=True)
             self.thread.start()
+            alert_anchor.start()  # Anchors closed alert windows off the send path
             logger.info("Enhanced data transmission started")
     
     def stop(self):
@@ -634,6 +1009,7 @@ class EnhancedDataTransmitter:
         self.running = False
         if self.thread:
             self.thread.join()
+        alert_anchor.flush()
         logger.info("Data transmission stopped")
     
     def get_stats(self):
@@ -642,35 +1018,121 @@ class EnhancedDataTransmitter:
             "running": self.running,
             "success_count": self.success_count,
             "error_count": self.error_count,
-            "recent_logs": self.transmission_log[-10:]  # Last 10 entries
+            "recent_logs": list(self.transmission_log)[-10:],  # Last 10 entries
+            "sampling": self.scheduler.stats() if config.ADAPTIVE_SAMPLING else None,
+            "logging": log_pipeline.stats() if log_pipeline else None
         }
     
+    def run_cycle(self):
+        """Generate and transmit one reading per region (one pass of the transmission loop)"""
+        simulator = get_simulator()
+        with self.cycle_lock:
+            self._housekeeping(simulator)
+            
+            # Generate fresh readings for all regions
+            regions = list(simulator.regions)
+            for index, region in enumerate(regions):
+                TRANSMIT_QUEUE_DEPTH.set(len(regions) - index)
+                self._process_region(simulator, region)
+            
+            TRANSMIT_QUEUE_DEPTH.set(0)
+    
+    def run_scheduled(self, now=None):
+        """Sample and transmit only the stations that are due; returns how many were sampled"""
+        simulator = get_simulator()
+        with self.cycle_lock:
+            self._housekeeping(simulator)
+            
+            # Pick up stations added or removed (e.g. by shard rebalancing) since the last pass
+            scheduler = self.scheduler
+            scheduler.base_interval = config.SEND_INTERVAL
+            scheduler.min_interval = config.MIN_SEND_INTERVAL
+            scheduler.max_interval = config.MAX_SEND_INTERVAL
+            if self._synced != (id(simulator), simulator.regions_version):
+                scheduler.sync(simulator.regions)
+                self._synced = (id(simulator), simulator.regions_version)
+            
+            now = now if now is not None else time.time()
+            due = scheduler.pop_due(now)
+            done = 0
+            try:
+                for index, (region, due_at) in enumerate(due):
+                    TRANSMIT_QUEUE_DEPTH.set(len(due) - index)
+                    reading = None
+                    try:
+                        reading = self._process_region(simulator, region)
+                    except Exception as e:
+                        logger.error(f"Error sampling {region}: {e}")
+                        self.error_count += 1
+                    scheduler.observe(region, reading, due_at, now)
+                    done = index + 1
+            finally:
+                # Popped stations must go back on the heap even if the pass fails,
+                # otherwise they are never sampled again
+                for region, due_at in due[done:]:
+                    scheduler.requeue(region, due_at)
+                TRANSMIT_QUEUE_DEPTH.set(0)
+        return len(due)
+    
+    def _housekeeping(self, simulator):
+        # Refresh real data periodically
+        simulator.refresh_real_data()
+        
+        # Flag sensors that missed their deadlines (e.g. dropped out last cycle). Deadlines
+        # follow the longest interval a healthy station can go without being sampled.
+        simulator.health.set_reporting_interval(
+            config.MAX_SEND_INTERVAL if config.ADAPTIVE_SAMPLING else config.SEND_INTERVAL
+        )
+        for region, state in simulator.health.check():
+            logger.warning("Sensor %s is now %s", region, state,
+                           extra={"category": "health", "region": region, "state": state})
+    
+    def _process_region(self, simulator, region):
+        """Generate, record and transmit one reading; returns it (None if the sensor dropped out)"""
+        reading = simulator.generate_reading(region)
+        
+        # Apply any running contamination scenario (None means the sensor dropped out)
+        injector = self.injector
+        if injector:
+            reading = injector.apply(reading)
+            if reading is None:
+                return None
+        
+        simulator.record_reading(region, reading)
+        
+        # Send to main backend
+        send_started = time.perf_counter()
+        success = self._send_to_main_backend(reading)
+        TRANSMIT_DURATION.observe(time.perf_counter() - send_started)
+        
+        if success:
+            self.success_count += 1
+            TRANSMIT_SUCCESS.inc()
+        else:
+            self.error_count += 1
+            TRANSMIT_ERROR.inc()
+        
+        # Send alerts if needed
+        if reading["status"]["alert"]:
+            self._send_alert(reading)
+        return reading
+    
     def _send_data_loop(self):
         """Enhanced data transmission loop"""
         while self.running:
             try:
-                # Refresh real data periodically
-                simulator.refresh_real_data()
-                
-                # Generate fresh readings for all regions
-                for region in simulator.regions:
-                    reading = simulator.generate_reading(region)
-                    simulator.latest_readings[region] = reading
+                if config.ADAPTIVE_SAMPLING:
+                    self.run_scheduled()
                     
-                    # Send to main backend
-                    success = self._send_to_main_backend(reading)
-                    
-                    if success:
-                        self.success_count += 1
-                    else:
-                        self.error_count += 1
+                    # Sleep until the next station is due (at most 1s so stop() stays responsive)
+                    next_due = self.scheduler.next_due()
+                    wait = 1.0 if next_due is None else next_due - time.time()
+                    time.sleep(min(1.0, max(0.05, wait)))
+                else:
+                    self.run_cycle()
                     
-                    # Send alerts if needed
-                    if reading["status"]["alert"]:
-                        self._send_alert(reading)
-                
-                # Wait before next transmission
-                time.sleep(config.SEND_INTERVAL)
+                    # Wait before next transmission
+                    time.sleep(config.SEND_INTERVAL)
                 
             except Exception as e:
                 logger.error(f"Error in enhanced data transmission: {e}")
@@ -681,6 +1143,7 @@ class EnhancedDataTransmitter:
         """Enhanced data sending with better formatting"""
         try:
             # Enhanced payload with more metadata
+            serialize_started = time.perf_counter()
             payload = {
                 "sensor_id": reading["sensor_id"],
                 "region": reading["location"]["region"],
@@ -697,6 +1160,7 @@ class EnhancedDataTransmitter:
                 "quality_score": reading["status"]["score"],
                 "recommendations": reading["status"].get("recommendations", [])
             }
+            SERIALIZE_DURATION.observe(time.perf_counter() - serialize_started)
             
             headers = {
                 "Content-Type": "application/json",
@@ -713,30 +1177,34 @@ class EnhancedDataTransmitter:
                 "alert": payload["alert"]
             }
             
-            # Send to main backend (uncomment when ready)
-            # response = requests.post(
-            #     f"{config.MAIN_BACKEND_URL}{config.SENSOR_UPLOAD_ENDPOINT}",
-            #     json=payload,
-            #     headers=headers,
-            #     timeout=10
-            # )
-            # 
-            # if response.status_code == 200:
-            #     log_entry["result"] = "success"
-            #     logger.info(f"Successfully sent data: {payload['sensor_id']} - {payload['status']}")
-            # else:
-            #     log_entry["result"] = f"error_{response.status_code}"
-            #     logger.error(f"Failed to send data: HTTP {response.status_code}")
-            
-            # For now, just simulate successful transmission
-            log_entry["result"] = "success_simulated"
-            logger.info(f"Would send to main backend: {payload['sensor_id']} - {payload['status']} (score: {payload['quality_score']:.2f})")
+            success = True
+            if config.TRANSMIT_ENABLED:
+                response = self.session.post(
+                    f"{config.MAIN_BACKEND_URL}{config.SENSOR_UPLOAD_ENDPOINT}",
+                    json=payload,
+                    headers=headers,
+                    timeout=10
+                )
+                
+                if response.status_code == 200:
+                    log_entry["result"] = "success"
+                    logger.info("Successfully sent data: %s - %s", payload["sensor_id"], payload["status"],
+                                extra={"category": "transmission", "region": log_entry["region"]})
+                else:
+                    log_entry["result"] = f"error_{response.status_code}"
+                    logger.error("Failed to send data: HTTP %s", response.status_code,
+                                 extra={"category": "transmission_error", "region": log_entry["region"]})
+                    success = False
+            else:
+                # Transmission disabled, just simulate successful transmission
+                log_entry["result"] = "success_simulated"
+                logger.info("Would send to main backend: %s - %s (score: %.2f)",
+                            payload["sensor_id"], payload["status"], payload["quality_score"],
+                            extra={"category": "transmission", "region": log_entry["region"]})
             
             self.transmission_log.append(log_entry)
-            if len(self.transmission_log) > 100:  # Keep only recent logs
-                self.transmission_log = self.transmission_log[-50:]
             
-            return True
+            return success
             
         except Exception as e:
             logger.error(f"Failed to send data to main backend: {e}")
@@ -759,15 +1227,26 @@ class EnhancedDataTransmitter:
                 "data_source": reading["data_source"]
             }
             
-            # Send alert (uncomment when ready)
-            # response = requests.post(
-            #     f"{config.MAIN_BACKEND_URL}{config.ALERT_ENDPOINT}",
-            #     json=alert_payload,
-            #     headers={"Content-Type": "application/json"},
-            #     timeout=5
-            # )
+            # Hash into the current Merkle window; the hash doubles as the alert id
+            alert_payload["alert_id"] = alert_anchor.add(alert_payload)
             
-            logger.warning(f"ALERT: {alert_payload['message']} (Score: {alert_payload['quality_score']:.2f})")
+            if config.TRANSMIT_ENABLED:
+                self.session.post(
+                    f"{config.MAIN_BACKEND_URL}{config.ALERT_ENDPOINT}",
+                    json=alert_payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=5
+                )
+            
+            logger.warning("ALERT: %s (Score: %.2f)", alert_payload["message"], alert_payload["quality_score"],
+                           extra={"category": "alert", "region": alert_payload["region"],
+                                  "severity": alert_payload["severity"]})
+            ALERTS_SENT.labels(alert_payload["severity"], alert_payload["region"]).inc()
+            
+            # Measure injection-to-alert latency for scenario runs
+            injector = self.injector
+            if injector:
+                injector.record_alert(reading)
             
         except Exception as e:
             logger.error(f"Failed to send alert: {e}")
@@ -775,6 +1254,111 @@ class EnhancedDataTransmitter:
 # Global enhanced data transmitter
 transmitter = EnhancedDataTransmitter()
 
+# Station sharding: this node's place in the cluster (node_id None = owns every station)
+shard = {"node_id": None, "nodes": [], "epoch": 0, "generation": None, "ring": None}
+_catalogue = None
+
+def station_catalogue():
+    """Every station in the deployment (including other nodes' shards) and its station info"""
+    global _catalogue
+    if _catalogue is None:
+        defaults = EnhancedWaterQualitySimulator(initialize=False)
+        stations = dict(defaults.regions)
+        stations.update(synthetic_stations(stations, config.CLUSTER_STATIONS))
+        _catalogue = (stations, defaults.real_data_fetcher.ne_stations)
+    return _catalogue
+
+def shard_owner(region):
+    """Node that owns a region in the current assignment (None when unsharded or unknown)"""
+    stations, station_info = station_catalogue()
+    ring = shard["ring"]
+    if ring is None or region not in stations:
+        return None
+    return ring.node_for(partition_key(stations[region], station_info.get(region)))
+
+def apply_shard(node_id, nodes, epoch, generation=None):
+    """
+    Rebalance this node onto a new cluster membership: drop stations that moved away and
+    start simulating the ones it now owns. Waits for any in-flight transmission pass.
+    """
+    simulator = get_simulator()
+    stations, station_info = station_catalogue()
+    ring = HashRing(nodes)
+    owners = ring.assign(stations, station_info)
+    
+    with transmitter.cycle_lock, simulator.regions_lock:
+        removed = [region for region in simulator.regions if owners.get(region) != node_id]
+        for region in removed:
+            simulator.remove_region(region)
+        added = [region for region, owner in owners.items()
+                 if owner == node_id and region not in simulator.regions]
+        for region in added:
+            info = stations[region]
+            simulator.add_region(region, info["lat"], info["lon"], info["pollution_factor"], info["data_source"])
+        shard.update(node_id=node_id, nodes=sorted(nodes), epoch=epoch, generation=generation, ring=ring)
+    
+    logger.info("Shard epoch %s: node %s owns %s stations (+%s / -%s)",
+                epoch, node_id, len(simulator.regions), len(added), len(removed))
+    return {"added": len(added), "removed": len(removed), "stations": len(simulator.regions)}
+
+@app.route('/api/shard', methods=['GET', 'POST'])
+def handle_shard():
+    """
+    GET/POST /api/shard
+    This node's shard assignment; POST applies a new membership and rebalances
+    Used by: Shard coordinator (shard_coordinator.py) when nodes join or leave
+    """
+    if request.method == 'GET':
+        return jsonify({
+            "sharded": shard["node_id"] is not None,
+            "node_id": shard["node_id"],
+            "nodes": shard["nodes"],
+            "epoch": shard["epoch"],
+            "generation": shard["generation"],
+            "stations": len(get_simulator().regions),
+            "catalogue_stations": len(station_catalogue()[0])
+        })
+    
+    data = request.json or {}
+    if not data.get("node_id") or not isinstance(data.get("nodes"), list):
+        return jsonify({"success": False, "error": "node_id and nodes are required"}), 400
+    epoch = int(data.get("epoch", 0))
+    generation = data.get("generation")
+    # Epochs only order pushes within one coordinator generation; a new generation wins
+    if generation == shard["generation"] and epoch < shard["epoch"]:
+        return jsonify({"success": False, "error": "Stale shard epoch", "epoch": shard["epoch"]}), 409
+    
+    result = apply_shard(data["node_id"], data["nodes"], epoch, generation)
+    return jsonify({"success": True, "node_id": data["node_id"], "epoch": epoch, **result})
+
+@app.route('/api/alerts/<alert_id>/proof', methods=['GET'])
+def get_alert_proof(alert_id):
+    """
+    GET /api/alerts/<alert_id>/proof
+    Merkle inclusion proof linking an alert to its anchored window root (O(log n))
+    Used by: Blockchain module, auditors verifying alert integrity
+    """
+    proof = alert_anchor.proof(alert_id)
+    if proof is None:
+        return jsonify({"success": False, "error": "Alert not found"}), 404
+    
+    # Not anchored yet: the proof exists once the window closes
+    status_code = 202 if proof["status"] == "pending" else 200
+    return jsonify({"success": True, **proof}), status_code
+
+@app.route('/api/alerts/anchors', methods=['GET'])
+def get_alert_anchors():
+    """
+    GET /api/alerts/anchors
+    Recently anchored Merkle roots and anchoring statistics
+    Used by: Blockchain module for on-chain submission
+    """
+    return jsonify({
+        "success": True,
+        "stats": alert_anchor.stats(),
+        "roots": alert_anchor.recent_roots(request.args.get('limit', 20, type=int))
+    })
+
 @app.route('/api/transmission/start', methods=['POST'])
 def start_transmission():
     """Start automatic data transmission to main backend"""
@@ -795,34 +1379,165 @@ def get_transmission_stats():
         "stats": transmitter.get_stats()
     })
 
+@app.route('/api/scenarios', methods=['GET'])
+def get_scenarios():
+    """
+    GET /api/scenarios
+    List bundled contamination scenarios and report on the running one
+    Used by: Development team for alert stress testing
+    """
+    injector = transmitter.injector
+    return jsonify({
+        "success": True,
+        "available": list_scenarios(),
+        "active": injector.report() if injector else None
+    })
+
+@app.route('/api/scenarios/start', methods=['POST'])
+def start_scenario():
+    """
+    POST /api/scenarios/start
+    Start a contamination scenario by name ({"name": ...}) or inline script ({"scenario": {...}})
+    Used by: Development team for alert stress testing
+    """
+    simulator = get_simulator()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "Request body must be a JSON object"}), 400
+    
+    try:
+        # Only bundled scenarios by name: the name never reaches the filesystem as a path
+        scenario = data['scenario'] if 'scenario' in data else load_named_scenario(data.get('name'))
+        injector = ScenarioInjector(scenario, simulator)
+    except (OSError, ValueError, KeyError) as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    transmitter.injector = injector
+    return jsonify({
+        "success": True,
+        "message": "Scenario started",
+        "scenario": injector.start()
+    })
+
+@app.route('/api/scenarios/stop', methods=['POST'])
+def stop_scenario():
+    """
+    POST /api/scenarios/stop
+    Stop the running scenario and return its final alert latency report
+    Used by: Development team for alert stress testing
+    """
+    injector = transmitter.injector
+    transmitter.injector = None
+    
+    if not injector:
+        return jsonify({"success": False, "error": "No scenario running"}), 400
+    
+    return jsonify({
+        "success": True,
+        "report": injector.report()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    GET /metrics
+    Prometheus text-format metrics: request latency, pipeline stage timings,
+    transmitter queue depth and send latency, cache hit rates, alert counts
+    Used by: Prometheus scraper, Grafana dashboards
+    """
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/api/profiler', methods=['GET'])
+def get_profile():
+    """
+    GET /api/profiler
+    Sampling profiler results; ?format=collapsed returns flamegraph input
+    Used by: Development team for performance investigations
+    """
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed(), mimetype="text/plain")
+    
+    return jsonify({
+        "success": True,
+        "running": profiler.running,
+        "interval_ms": profiler.interval_s * 1000,
+        "samples": profiler.sample_count,
+        "top_functions": profiler.top_functions(request.args.get('limit', 20, type=int))
+    })
+
+@app.route('/api/profiler/start', methods=['POST'])
+def start_profiler():
+    """Start the sampling profiler (optional body: {"interval_ms": 10})"""
+    data = request.json or {}
+    interval_ms = max(1, data.get('interval_ms', 10))
+    started = profiler.start(interval_ms / 1000)
+    return jsonify({"success": started, "message": "Profiler started" if started else "Profiler already running"})
+
+@app.route('/api/profiler/stop', methods=['POST'])
+def stop_profiler():
+    """Stop the sampling profiler, keeping its samples"""
+    stopped = profiler.stop()
+    return jsonify({"success": stopped, "message": "Profiler stopped" if stopped else "Profiler not running"})
+
 @app.route('/api/config', methods=['GET', 'POST'])
 def handle_config():
     """Enhanced configuration management"""
+    simulator = get_simulator()
+    
     if request.method == 'GET':
         return jsonify({
             "main_backend_url": config.MAIN_BACKEND_URL,
             "send_interval": config.SEND_INTERVAL,
             "prefer_real_data": config.PREFER_REAL_DATA,
-            "regions": list(simulator.regions.keys()),
-            "data_sources": {region: info["data_source"] for region, info in simulator.regions.items()},
+            "transmit_enabled": config.TRANSMIT_ENABLED,
+            "adaptive_sampling": config.ADAPTIVE_SAMPLING,
+            "min_send_interval": config.MIN_SEND_INTERVAL,
+            "max_send_interval": config.MAX_SEND_INTERVAL,
+            "regions": list(simulator.regions.copy()),
+            "data_sources": {region: info["data_source"] for region, info in simulator.regions.copy().items()},
             "api_version": "2.0_enhanced"
         })
     else:
         data = request.json
         updated_fields = []
         
+        # Validate every interval before changing any, so a bad request leaves config intact
+        intervals = {
+            'send_interval': config.SEND_INTERVAL,
+            'min_send_interval': config.MIN_SEND_INTERVAL,
+            'max_send_interval': config.MAX_SEND_INTERVAL
+        }
+        for key in intervals:
+            if key not in data:
+                continue
+            value = data[key]
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                return jsonify({"success": False, "error": f"'{key}' must be a positive number of seconds"}), 400
+            intervals[key] = max(10, value)  # Minimum 10 seconds
+            updated_fields.append(key)
+        config.SEND_INTERVAL = intervals['send_interval']
+        config.MIN_SEND_INTERVAL = intervals['min_send_interval']
+        config.MAX_SEND_INTERVAL = max(intervals['min_send_interval'], intervals['max_send_interval'])
+        
         if 'main_backend_url' in data:
             config.MAIN_BACKEND_URL = data['main_backend_url']
             updated_fields.append('main_backend_url')
         
-        if 'send_interval' in data:
-            config.SEND_INTERVAL = max(10, data['send_interval'])  # Minimum 10 seconds
-            updated_fields.append('send_interval')
-        
         if 'prefer_real_data' in data:
             config.PREFER_REAL_DATA = data['prefer_real_data']
             updated_fields.append('prefer_real_data')
         
+        if 'transmit_enabled' in data:
+            config.TRANSMIT_ENABLED = bool(data['transmit_enabled'])
+            updated_fields.append('transmit_enabled')
+        
+        if 'adaptive_sampling' in data:
+            config.ADAPTIVE_SAMPLING = bool(data['adaptive_sampling'])
+            updated_fields.append('adaptive_sampling')
+        
         return jsonify({
             "success": True,
             "message": "Configuration updated",
@@ -830,7 +1545,90 @@ def handle_config():
         })
 
 # Main execution
+def _join_cluster(coordinator_url, node_url, attempts=30):
+    """Register this node with a shard coordinator, retrying while either side starts up"""
+    for _ in range(attempts):
+        try:
+            # The coordinator pushes our shard straight back, so our own server must be up
+            requests.get(f"{node_url}/api/ready", timeout=5)
+            response = requests.post(f"{coordinator_url.rstrip('/')}/api/cluster/join",
+                                     json={"url": node_url}, timeout=10)
+            if response.ok:
+                logger.info(f"Joined shard coordinator {coordinator_url} as {node_url}")
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    logger.error(f"Could not join shard coordinator {coordinator_url}")
+    return False
+
+_app_created = False
+_transmitter_lock_file = None  # Held open for the process lifetime by the owning worker
+
+def claim_transmitter(lock_path):
+    """
+    Try to become the one process that transmits (non-blocking advisory file lock).
+    Returns True for the owner. Without fcntl (Windows) every caller owns it.
+    """
+    global _transmitter_lock_file
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    lock_file = open(lock_path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _transmitter_lock_file = lock_file
+    return True
+
+def _start_background_work(start_transmission):
+    warm_up(config.SNAPSHOT_PATH)
+    if start_transmission and claim_transmitter(config.TRANSMITTER_LOCK):
+        logger.info(f"This worker (pid {os.getpid()}) owns data transmission")
+        transmitter.start()
+
+def create_app(start_transmission=True):
+    """
+    App factory for WSGI servers, e.g. gunicorn -w 4 "enhanced_iot_backend:create_app()".
+    Configures logging, warms the simulator on a background thread (so /api/ready turns
+    200 without waiting for traffic) and starts data transmission in exactly one worker:
+    whichever first takes config.TRANSMITTER_LOCK. Gunicorn calls it in each worker after
+    the fork (unless --preload is set, in which case call it from a post_fork hook).
+    """
+    global _app_created
+    with _simulator_lock:
+        if _app_created:
+            return app
+        _app_created = True
+    configure_logging()
+    threading.Thread(target=_start_background_work, args=(start_transmission,), daemon=True,
+                     name="simulator-warm-up").start()
+    return app
+
 if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="IoT Water Quality Monitoring Backend")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--coordinator", help="Shard coordinator URL to join as a node")
+    parser.add_argument("--node-url", help="URL the coordinator reaches this node on "
+                                           "(default http://127.0.0.1:<port>)")
+    parser.add_argument("--stations", type=int, default=0,
+                        help="Total stations across the cluster (sets CLUSTER_STATIONS)")
+    args = parser.parse_args()
+    config.CLUSTER_STATIONS = args.stations
+    configure_logging()
+    node_url = args.node_url or f"http://127.0.0.1:{args.port}"
+    
+    if args.coordinator:
+        # Nodes sharing a working directory keep their own snapshot and anchor trees
+        config.SNAPSHOT_PATH = f"simulator_snapshot_{args.port}.json"
+        config.ANCHOR_DIR = f"alert_anchors_{args.port}"
+        alert_anchor = AlertAnchor(config.ANCHOR_DIR, config.ANCHOR_WINDOW, config.ANCHOR_SINK)
+    
     print("="*70)
     print("🌊 IoT Water Quality Monitoring Backend - SIH 2025 (Enhanced)")
     print("="*70)
@@ -855,12 +1653,32 @@ if __name__ == '__main__':
     print("   • GET /api/sensors/alerts - Critical events for immutable logging")
     print("   • Enhanced alert payload with verification data")
     print("   • Data source tracking for authenticity")
-    print("\n🚀 Server starting on http://localhost:5000")
-    print("📚 API Documentation: http://localhost:5000/api/status")
+    print(f"\n🚀 Server starting on http://localhost:{args.port}")
+    print(f"📚 API Documentation: http://localhost:{args.port}/api/status")
     print("="*70)
     
-    # Start enhanced data transmission
-    transmitter.start()
+    # Exit normally on SIGTERM so atexit handlers run (the open alert window gets anchored)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    # The reloader's watcher process only restarts the server; background work runs in
+    # the serving child, otherwise two transmitters would anchor into the same directory
+    use_reloader = not args.coordinator
+    serving = not use_reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+    
+    if serving:
+        # Build simulator state before serving (warm start from snapshot if present)
+        warm_up(config.SNAPSHOT_PATH)
+        
+        # A shard node serves no stations until the coordinator assigns its share
+        if args.coordinator:
+            apply_shard(node_url, [], 0)
+        
+        # Start enhanced data transmission
+        transmitter.start()
+        
+        # As a shard node, the coordinator assigns this node's stations once it joins
+        if args.coordinator:
+            threading.Thread(target=_join_cluster, args=(args.coordinator, node_url), daemon=True).start()
     
-    # Run Flask app
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Run Flask app (shard nodes skip the reloader so a restart can't rejoin mid-rebalance)
+    app.run(debug=True, host='0.0.0.0', port=args.port, use_reloader=use_reloader)
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Geographic helpers shared by the IoT Water Quality Monitoring Backend modules - SIH 2025
+# Station positions are plain (lat, lon) degrees; distances are great-circle kilometres.
+
+import math
+
+EARTH_RADIUS_KM = 6371
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
@@ -0,0 +1,248 @@
+# Prometheus-style metrics for the IoT Water Quality Monitoring Backend - SIH 2025
+# Counters, gauges and histograms rendered in the Prometheus text exposition format,
+# plus an optional sampling profiler that can be switched on and off at runtime.
+#
+# Hot paths should bind labels once (metric.labels(...)) and keep the child: a bound
+# inc()/observe() is a lock plus a couple of list updates, well under 1 µs per sample.
+
+import math
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _StackCounter
+
+# Default latency buckets in seconds, from 10 µs to 5 s
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (None when empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        """Return the child metric for these label values (cache it on hot paths)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        """Child for label-less metrics"""
+        return self.labels()
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+class _ValueChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def render(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+                for key, child in self._items()]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    metric_type = "gauge"
+
+    def set(self, value):
+        self._default().set(value)
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def render(self):
+        lines = []
+        for key, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples every thread's stack on a background thread
+    Costs nothing while stopped; start()/stop() can be called at any time
+    """
+
+    def __init__(self, interval_s=0.01, max_depth=48):
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.samples = _StackCounter()
+        self.sample_count = 0
+        self.running = False
+        self.started_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, interval_s=None):
+        """Start sampling (clears previous samples)"""
+        with self._lock:
+            if self.running:
+                return False
+            if interval_s:
+                self.interval_s = interval_s
+            self.samples = _StackCounter()
+            self.sample_count = 0
+            self.started_at = time.time()
+            self.running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        """Stop sampling, keeping the collected samples"""
+        with self._lock:
+            if not self.running:
+                return False
+            self.running = False
+            thread = self._thread
+        thread.join()
+        return True
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while self.running:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+            time.sleep(self.interval_s)
+
+    def collapsed(self):
+        """Samples in collapsed-stack format (input for flamegraph.pl / speedscope)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def top_functions(self, limit=20):
+        """Functions most often on top of a stack (self time)"""
+        leaves = _StackCounter()
+        for stack, count in list(self.samples.items()):
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [
+            {"function": function, "samples": count, "percent": round(100 * count / total, 2)}
+            for function, count in leaves.most_common(limit)
+        ]
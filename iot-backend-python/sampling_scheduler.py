@@ -0,0 +1,214 @@
+# Adaptive per-station sampling scheduler for the IoT Water Quality Monitoring Backend - SIH 2025
+# Replaces "sample every station every SEND_INTERVAL" with a due time per station. Each
+# station's interval runs from max_interval (stable) down to min_interval (urgent):
+#
+# - only stations in excellent condition go beyond base_interval, so a degraded station
+#   is never sampled less often than by the fixed loop
+# - volatile stations (quality score variance above sensor noise) sample faster
+# - stations in alert sample faster than healthy ones
+# - a critical issue the station has not reported recently (a new event, not a chronic
+#   condition) puts it on min_interval for a while and pulls its neighbours' next sample
+#   forward, since contamination spreads to nearby and downstream stations
+#
+# Due times live in a min-heap. The next due time builds on the previous due time,
+# not on the time the sample actually ran, so sampling does not drift. A station that
+# falls more than one interval behind is rescheduled from now instead of bursting.
+
+import hashlib
+import heapq
+import itertools
+import math
+import time
+
+from geo import haversine_km
+
+# Quality score standard deviation from ordinary sensor noise, and the excess over it
+# that counts as fully volatile
+NOISE_STD = 0.05
+VOLATILITY_REF = 0.1
+
+# Urgency (0 = max_interval, 1 = min_interval) of a station that is steadily in alert
+ALERT_URGENCY = 0.5
+
+# A critical issue is "new" if the station has not reported it in this many samples
+ISSUE_MEMORY = 20
+
+# Grid cell size in degrees for neighbour lookups (~55 km north-south)
+GRID_CELL_DEG = 0.5
+
+class AdaptiveSamplingScheduler:
+    """
+    Priority-queue sampling scheduler with one due time per station
+    With adaptive=False every station is sampled at base_interval (the classic fixed loop).
+    """
+
+    def __init__(self, base_interval=30, min_interval=10, max_interval=60,
+                 neighbour_radius_km=50, hot_for_s=600, adaptive=True, clock=time.time):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.neighbour_radius_km = neighbour_radius_km
+        self.hot_for_s = hot_for_s
+        self.adaptive = adaptive
+        self.clock = clock
+
+        self._heap = []  # (due time, tie-breaker, region); stale entries skipped lazily
+        self._counter = itertools.count()
+        self.due = {}  # region -> current due time
+        self.interval = {}  # region -> last chosen interval
+        self._score_mean = {}
+        self._score_var = {}
+        self._sample_index = {}  # region -> samples taken
+        self._issues_seen = {}  # region -> {issue kind: sample index last reported}
+        self._hot_until = {}
+        self._location = {}
+        self._grid = {}  # (cell lat, cell lon) -> set of regions
+
+        self.samples = 0
+        self.boosts = 0
+
+    def sync(self, regions):
+        """Schedule new stations and forget removed ones; regions maps name -> {lat, lon, ...}"""
+        now = self.clock()
+        for region, info in regions.items():
+            if region in self.due:
+                continue
+            # Spread first samples over one base interval so new stations don't all fire at once
+            offset = int(hashlib.md5(region.encode("utf-8")).hexdigest(), 16) % 1000 / 1000
+            self._schedule(region, now + offset * self.base_interval)
+            self.interval[region] = self.base_interval
+            self._location[region] = (info["lat"], info["lon"])
+            self._grid.setdefault(self._cell(info["lat"], info["lon"]), set()).add(region)
+
+        for region in [r for r in self.due if r not in regions]:
+            del self.due[region]
+            for state in (self.interval, self._score_mean, self._score_var,
+                          self._sample_index, self._issues_seen, self._hot_until):
+                state.pop(region, None)
+            lat, lon = self._location.pop(region)
+            self._grid[self._cell(lat, lon)].discard(region)
+
+    def next_due(self):
+        """Earliest due time, or None when nothing is scheduled"""
+        while self._heap:
+            due, _, region = self._heap[0]
+            if self.due.get(region) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None):
+        """Remove and return (region, due time) for every station due by now, earliest first"""
+        now = now if now is not None else self.clock()
+        ready = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, region = heapq.heappop(self._heap)
+            if self.due.get(region) == due:
+                ready.append((region, due))
+        return ready
+
+    def requeue(self, region, due):
+        """Put a popped station back on the heap unchanged (its sample did not happen)"""
+        if region in self.due:
+            self._schedule(region, due)
+
+    def observe(self, region, reading, due, now=None):
+        """
+        Reschedule a sampled station from its reading (None if it produced no reading).
+        Returns the regions whose next sample was pulled forward.
+        """
+        now = now if now is not None else self.clock()
+        if region not in self.due:
+            return []
+        self.samples += 1
+
+        boosted = []
+        if reading is None or not self.adaptive:
+            interval = self.base_interval
+        else:
+            status = reading["status"]
+            urgency = self._update_volatility(region, status["score"])
+            if status["alert"]:
+                urgency = max(urgency, ALERT_URGENCY)
+
+            if self._new_issue(region, status["critical_issues"]):
+                self._hot_until[region] = now + self.hot_for_s
+                boosted = self._boost_neighbours(region, now)
+            if now < self._hot_until.get(region, 0):
+                urgency = 1.0
+
+            interval = self.max_interval - (self.max_interval - self.min_interval) * urgency
+            if status["level"] != "excellent":
+                # Only stations with margin to spare may be sampled less often than the fixed loop
+                interval = min(interval, self.base_interval)
+
+        self.interval[region] = interval
+        next_due = due + interval
+        if next_due < now - interval:
+            next_due = now  # Too far behind: skip the missed slots rather than burst
+        self._schedule(region, next_due)
+        return boosted
+
+    def _update_volatility(self, region, score):
+        """EWMA of the quality score and its variance; returns volatility above noise, 0..1"""
+        mean = self._score_mean.get(region)
+        if mean is None:
+            self._score_mean[region] = score
+            self._score_var[region] = 0.0
+            return 0.0
+        delta = score - mean
+        self._score_mean[region] = mean + 0.3 * delta
+        self._score_var[region] = 0.7 * (self._score_var[region] + 0.3 * delta * delta)
+        excess = math.sqrt(self._score_var[region]) - NOISE_STD
+        return min(1.0, max(0.0, excess / VOLATILITY_REF))
+
+    def _new_issue(self, region, critical_issues):
+        """True if a critical issue appears that the station has not reported recently"""
+        index = self._sample_index.get(region, 0) + 1
+        self._sample_index[region] = index
+        seen = self._issues_seen.setdefault(region, {})
+        new = False
+        for issue in critical_issues:
+            kind = issue.split(":")[0]
+            last = seen.get(kind)
+            # The first few samples only establish which issues are chronic
+            if index > 3 and (last is None or index - last > ISSUE_MEMORY):
+                new = True
+            seen[kind] = index
+        return new
+
+    def _boost_neighbours(self, region, now):
+        """Schedule every station within neighbour_radius_km for an immediate sample"""
+        lat, lon = self._location[region]
+        cell_lat, cell_lon = self._cell(lat, lon)
+        boosted = []
+        for d_lat in (-1, 0, 1):
+            for d_lon in (-1, 0, 1):
+                for other in self._grid.get((cell_lat + d_lat, cell_lon + d_lon), ()):
+                    if other == region or self.due.get(other, now) <= now:
+                        continue
+                    o_lat, o_lon = self._location[other]
+                    if haversine_km(lat, lon, o_lat, o_lon) <= self.neighbour_radius_km:
+                        self._schedule(other, now)
+                        boosted.append(other)
+        self.boosts += len(boosted)
+        return boosted
+
+    def _schedule(self, region, due):
+        self.due[region] = due
+        heapq.heappush(self._heap, (due, next(self._counter), region))
+
+    @staticmethod
+    def _cell(lat, lon):
+        return (math.floor(lat / GRID_CELL_DEG), math.floor(lon / GRID_CELL_DEG))
+
+    def stats(self):
+        intervals = [self.interval[r] for r in self.due]
+        return {
+            "adaptive": self.adaptive,
+            "stations": len(self.due),
+            "samples": self.samples,
+            "neighbour_boosts": self.boosts,
+            "mean_interval_s": round(sum(intervals) / len(intervals), 2) if intervals else None,
+            "uplinks_per_minute": round(sum(60 / i for i in intervals), 1) if intervals else 0
+        }
@@ -0,0 +1,340 @@
+# Scenario-driven contamination event injector for the IoT Water Quality Monitoring Backend - SIH 2025
+# Loads declarative event scripts (JSON, see scenarios/) and applies them to the reading
+# generation stream, then reports end-to-end alert latency from injection to _send_alert.
+#
+# Usage: python scenario_injector.py scenarios/brahmaputra_turbidity_spike.json --stations 10000
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from geo import haversine_km
+from metrics import percentile
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+EVENT_TYPES = ("spike", "dropout")
+
+# Event fields that must be numbers when present
+NUMERIC_EVENT_FIELDS = ("start_s", "duration_s", "ramp_s", "flow_kmh", "radius_km",
+                        "fraction", "multiply", "add", "set")
+
+# Physical limits for injected values. Injection deliberately ignores the simulator's
+# normal ranges (e.g. dissolved oxygen min 5 mg/L) so events can push readings past them.
+PHYSICAL_LIMITS = {
+    "ph": (0, 14)
+}
+
+def load_scenario(name_or_path):
+    """Load a scenario script by file path or by name from the scenarios/ directory (CLI use)"""
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(SCENARIO_DIR, f"{name_or_path}.json")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def load_named_scenario(name):
+    """Load a bundled scenario by name only; names not in list_scenarios() raise ValueError"""
+    if name not in list_scenarios():
+        raise ValueError(f"Unknown scenario: {name}")
+    with open(os.path.join(SCENARIO_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def list_scenarios():
+    """Names of the bundled scenario scripts"""
+    if not os.path.isdir(SCENARIO_DIR):
+        return []
+    return sorted(name[:-5] for name in os.listdir(SCENARIO_DIR) if name.endswith(".json"))
+
+def validate_scenario(scenario):
+    """Raise ValueError if a scenario script is malformed"""
+    if not isinstance(scenario, dict):
+        raise ValueError("Scenario must be a JSON object")
+    time_scale = scenario.get("time_scale", 1.0)
+    if not _is_number(time_scale) or time_scale <= 0:
+        raise ValueError("Scenario 'time_scale' must be a positive number")
+    events = scenario.get("events")
+    if not isinstance(events, list) or not events:
+        raise ValueError("Scenario must define a non-empty 'events' list")
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError("Every event must be a JSON object")
+        if event.get("type") not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event.get('type')}")
+        if not isinstance(event.get("id"), str) or not event["id"]:
+            raise ValueError("Every event needs a non-empty string 'id'")
+        for key in NUMERIC_EVENT_FIELDS:
+            if key in event and not _is_number(event[key]):
+                raise ValueError(f"Event {event['id']} field '{key}' must be a number")
+        for key in ("origin", "river", "parameter"):
+            if key in event and not isinstance(event[key], str):
+                raise ValueError(f"Event {event['id']} field '{key}' must be a string")
+        regions = event.get("regions", [])
+        if not isinstance(regions, list) or not all(isinstance(r, str) for r in regions):
+            raise ValueError(f"Event {event['id']} field 'regions' must be a list of region names")
+        if not isinstance(event.get("all", False), bool):
+            raise ValueError(f"Event {event['id']} field 'all' must be true or false")
+        if event["type"] == "spike":
+            if "parameter" not in event:
+                raise ValueError(f"Spike event {event['id']} needs a 'parameter'")
+            if not any(key in event for key in ("multiply", "add", "set")):
+                raise ValueError(f"Spike event {event['id']} needs 'multiply', 'add' or 'set'")
+        if event.get("flow_kmh") is not None and event["flow_kmh"] <= 0:
+            raise ValueError(f"Event {event['id']} needs a positive 'flow_kmh'")
+
+class ScenarioInjector:
+    """
+    Applies a scenario's events to generated readings and tracks alert latency
+    Event onsets are precomputed per station, so apply() is O(events at that station)
+    """
+
+    def __init__(self, scenario, simulator, clock=time.time):
+        validate_scenario(scenario)
+        for event in scenario["events"]:
+            if event["type"] == "spike" and event["parameter"] not in simulator.parameters:
+                raise ValueError(f"Spike event {event['id']} targets unknown parameter {event['parameter']}")
+        self.scenario = scenario
+        self.simulator = simulator
+        self.clock = clock
+        self.time_scale = scenario.get("time_scale", 1.0)
+        self.sla_seconds = scenario.get("sla_seconds")
+
+        self.started_at = None
+        self.schedule = {}  # region -> [(event, onset offset in wall seconds)]
+        self.affected = set()  # (event id, region) pairs that have been injected
+        self.alerted = {}  # (event id, region) -> alert latency in seconds
+        self.injected_readings = 0
+        self.dropped_readings = 0
+        self.masked_readings = 0  # Injected readings already alerting for unrelated reasons
+        self._lock = threading.Lock()
+
+        for event in scenario["events"]:
+            for region, delay_s in self._targets(event).items():
+                offset = (event.get("start_s", 0) + delay_s) / self.time_scale
+                self.schedule.setdefault(region, []).append((event, offset))
+
+    def _targets(self, event):
+        """Map each targeted region to its propagation delay in simulated seconds"""
+        regions = self.simulator.regions
+        origin = event.get("origin")
+        if origin is not None and origin not in regions:
+            raise ValueError(f"Unknown origin region: {origin}")
+
+        if event.get("all"):
+            selected = set(regions)
+        else:
+            selected = set(r for r in event.get("regions", []) if r in regions)
+            if "river" in event:
+                stations = self.simulator.real_data_fetcher.ne_stations
+                selected.update(r for r in regions if stations.get(r, {}).get("river") == event["river"])
+            if "radius_km" in event and origin is not None:
+                o = regions[origin]
+                selected.update(
+                    r for r, info in regions.items()
+                    if haversine_km(o["lat"], o["lon"], info["lat"], info["lon"]) <= event["radius_km"]
+                )
+            if origin is not None:
+                selected.add(origin)
+
+        # Sensor dropouts hit a deterministic fraction of the selected stations
+        fraction = event.get("fraction")
+        if fraction is not None:
+            selected = set(
+                r for r in selected
+                if int(hashlib.md5(f"{event['id']}:{r}".encode()).hexdigest(), 16) % 10000 < fraction * 10000
+            )
+
+        # Propagate downstream from the origin at the given flow speed
+        flow_kmh = event.get("flow_kmh")
+        targets = {}
+        for region in selected:
+            delay_s = 0.0
+            if flow_kmh and origin is not None:
+                o, info = regions[origin], regions[region]
+                delay_s = haversine_km(o["lat"], o["lon"], info["lat"], info["lon"]) / flow_kmh * 3600
+            targets[region] = delay_s
+        return targets
+
+    def start(self):
+        """Start the scenario clock"""
+        self.started_at = self.clock()
+        return {
+            "scenario": self.scenario.get("name"),
+            "stations_targeted": len(self.schedule),
+            "started_at": self.started_at
+        }
+
+    def apply(self, reading):
+        """
+        Apply active events to a freshly generated reading.
+        Returns the (possibly modified) reading, or None when the sensor has dropped out.
+        """
+        if self.started_at is None:
+            return reading
+        region = reading["location"]["region"]
+        events = self.schedule.get(region)
+        if not events:
+            return reading
+
+        now = self.clock()
+        elapsed = now - self.started_at
+        injected = []
+        for event, offset in events:
+            active_for = elapsed - offset
+            duration = event.get("duration_s")
+            if active_for < 0 or (duration is not None and active_for > duration / self.time_scale):
+                continue
+
+            if event["type"] == "dropout":
+                with self._lock:
+                    self.dropped_readings += 1
+                return None
+
+            if not injected:
+                reading = copy.deepcopy(reading)
+            self._apply_spike(reading, event, active_for)
+            injected.append((event["id"], self.started_at + offset))
+
+        if not injected:
+            return reading
+
+        before = reading["status"]
+        reading["status"] = after = self.simulator.assess_water_quality(reading["parameters"])
+        if "metadata" in reading:
+            reading["metadata"]["quality_score"] = after["score"]
+
+        # The injection caused the alert if the unmodified reading was not alerting, or if
+        # it raised a critical issue the unmodified reading didn't have. A station that was
+        # already alerting for other reasons says nothing about detection latency.
+        issues_before = {issue.split(":")[0] for issue in before["critical_issues"]}
+        new_issue = any(issue.split(":")[0] not in issues_before for issue in after["critical_issues"])
+        caused_alert = after["alert"] and (not before["alert"] or new_issue)
+        reading["scenario"] = {
+            "name": self.scenario.get("name"),
+            "events": [{"id": event_id, "onset": onset} for event_id, onset in injected],
+            "caused_alert": caused_alert
+        }
+
+        with self._lock:
+            self.injected_readings += 1
+            if after["alert"] and not caused_alert:
+                self.masked_readings += 1
+            for event_id, _ in injected:
+                self.affected.add((event_id, region))
+        return reading
+
+    def _apply_spike(self, reading, event, active_for):
+        """Modify one parameter, ramping linearly to full strength over ramp_s"""
+        param = event["parameter"]
+        data = reading["parameters"][param]
+        ramp = event.get("ramp_s", 0) / self.time_scale
+        strength = min(1.0, active_for / ramp) if ramp > 0 else 1.0
+
+        value = data["value"]
+        if "set" in event:
+            target = event["set"]
+        elif "multiply" in event:
+            target = value * event["multiply"]
+        else:
+            target = value + event["add"]
+        value += (target - value) * strength
+
+        low, high = PHYSICAL_LIMITS.get(param, (0, None))
+        value = max(low, value)
+        if high is not None:
+            value = min(high, value)
+        data["value"] = round(value, 2)
+        data["source"] = "scenario_injected"
+
+    def record_alert(self, reading, sent_at=None):
+        """
+        Record alert latency for injected readings (first alert per event and station).
+        Only alerts the injection caused count as detections.
+        """
+        tag = reading.get("scenario")
+        if not tag or not tag.get("caused_alert"):
+            return
+        sent_at = sent_at if sent_at is not None else self.clock()
+        region = reading["location"]["region"]
+        with self._lock:
+            for event in tag["events"]:
+                key = (event["id"], region)
+                if key not in self.alerted:
+                    self.alerted[key] = max(0.0, sent_at - event["onset"])
+
+    def report(self):
+        """Alert latency percentiles and detection coverage so far"""
+        with self._lock:
+            latencies = list(self.alerted.values())
+            affected = len(self.affected)
+            injected = self.injected_readings
+            dropped = self.dropped_readings
+            masked = self.masked_readings
+
+        report = {
+            "scenario": self.scenario.get("name"),
+            "running_for_s": round(self.clock() - self.started_at, 3) if self.started_at else 0,
+            "stations_targeted": len(self.schedule),
+            "stations_affected": affected,
+            "stations_alerted": len(latencies),
+            "injected_readings": injected,
+            "dropped_readings": dropped,
+            "masked_readings": masked,
+            "alert_latency_s": {
+                name: round(value, 4) if value is not None else None
+                for name, value in (
+                    ("p50", percentile(latencies, 50)),
+                    ("p90", percentile(latencies, 90)),
+                    ("p99", percentile(latencies, 99)),
+                    ("max", max(latencies) if latencies else None)
+                )
+            }
+        }
+        if self.sla_seconds is not None:
+            within = sum(1 for latency in latencies if latency <= self.sla_seconds)
+            report["sla_seconds"] = self.sla_seconds
+            report["within_sla"] = within
+            report["sla_met"] = bool(latencies) and within == len(latencies)
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a contamination scenario and report alert latency")
+    parser.add_argument("scenario", help="Scenario name (from scenarios/) or path to a JSON script")
+    parser.add_argument("--stations", type=int, default=0, help="Pad with synthetic stations up to this count")
+    parser.add_argument("--cycles", type=int, default=5, help="Transmission cycles to run")
+    parser.add_argument("--interval", type=float, default=0.0, help="Seconds between cycles")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import enhanced_iot_backend as backend
+    from simulation_engine import add_synthetic_stations
+
+    # Per-reading log lines would dominate a run at thousands of stations
+    backend.logger.setLevel("ERROR")
+
+    simulator = backend.warm_up()
+    add_synthetic_stations(simulator, args.stations)
+
+    injector = ScenarioInjector(load_scenario(args.scenario), simulator)
+    backend.transmitter.injector = injector
+    print(injector.start())
+
+    for cycle in range(args.cycles):
+        started = time.perf_counter()
+        backend.transmitter.run_cycle()
+        print(f"cycle {cycle + 1}: {len(simulator.regions)} stations in {time.perf_counter() - started:.2f}s")
+        if args.interval and cycle < args.cycles - 1:
+            time.sleep(args.interval)
+
+    print(json.dumps(injector.report(), indent=2))
+
+if __name__ == '__main__':
+    main()
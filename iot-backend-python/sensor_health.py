@@ -0,0 +1,320 @@
+# Sensor health tracking for the IoT Water Quality Monitoring Backend - SIH 2025
+# Tracks which sensors went silent (stale/offline), which are stuck on a constant value,
+# and how far each sensor has drifted from neighbouring stations on the same river.
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+import time
+from datetime import datetime, timezone
+
+# Parameters compared against river neighbours, with the drift (in parameter units)
+# beyond which a sensor is flagged for recalibration
+DRIFT_THRESHOLDS = {
+    "ph": 0.3,
+    "dissolved_oxygen": 1.0,
+    "conductivity": 30.0,
+    "temperature": 1.5
+}
+
+# Drift is only estimated on rivers with at least this many sensors: with two, a drift in
+# either one looks identical from both sides and can't be attributed
+MIN_RIVER_SENSORS = 3
+
+# Missed reporting intervals after which a sensor counts as stale / offline
+STALE_AFTER_INTERVALS = 3
+OFFLINE_AFTER_INTERVALS = 10
+
+class SensorHealthTracker:
+    """
+    Per-sensor health state for thousands of sensors
+
+    - Liveness: every reading pushes a deadline onto a min-heap. check() only pops expired
+      deadlines (skipping ones superseded by newer readings), so finding stale sensors
+      never scans the whole fleet.
+    - Flatline: a parameter repeating the exact same value for `flatline_readings`
+      consecutive readings marks the sensor as stuck. Values pinned at a parameter's
+      range limit (`limits`) are clamped, not frozen, and never count.
+    - Drift: each sensor's offset from the mean of its river neighbours is smoothed and
+      compared with the offset learned right after its last calibration. Per-river sums
+      keep the neighbour mean O(1) per reading. One drifting sensor also shifts its
+      neighbours' offsets (by -drift / (n - 1)), so drift is attributed against the median
+      raw drift on the river, kept in a sorted list per river and parameter.
+    """
+
+    def __init__(self, stale_after_s=90, offline_after_s=300, flatline_readings=12,
+                 baseline_readings=20, limits=None, clock=time.time):
+        self.stale_after_s = stale_after_s
+        self.offline_after_s = offline_after_s
+        self.flatline_readings = flatline_readings
+        self.limits = limits or {}  # param -> (min, max) the simulator clamps readings to
+        self.baseline_readings = baseline_readings
+        self.clock = clock
+
+        self.status = {}  # region -> online / stale / offline
+        self.counts = {"online": 0, "stale": 0, "offline": 0}
+        self.last_seen = {}
+        self.last_calibration = {}
+        self._deadlines = []  # heap of (deadline, region, state it leads to)
+
+        self._last_values = {}  # region -> {param: (value, repeat count)}
+        self.stuck = {}  # region -> [stuck params]
+
+        self.river = {}
+        self._river_sums = {}  # river -> {param: [sum of sensor averages, sensor count]}
+        self._average = {}  # region -> {param: fast EWMA of value}
+        self._offset = {}  # region -> {param: slow EWMA of offset from river neighbours}
+        self._baseline = {}  # region -> {param: offset learned after calibration}
+        self._since_calibration = {}
+        self._raw_drift = {}  # region -> {param: offset change since baseline}
+        self._river_drifts = {}  # (river, param) -> sorted raw drifts of that river's sensors
+        self.drift = {}  # region -> {param: drift estimate}
+        self.drifting = {}  # region -> [params beyond DRIFT_THRESHOLDS]
+
+        self._lock = threading.Lock()
+
+    def register(self, region, river=None, last_calibration=None):
+        """Start tracking a sensor (counted as online until its first deadline passes)"""
+        with self._lock:
+            now = self.clock()
+            if region not in self.status:
+                self.status[region] = "online"
+                self.counts["online"] += 1
+            self.river[region] = river
+            if last_calibration:
+                self.last_calibration[region] = last_calibration
+            self.last_seen[region] = now
+            heapq.heappush(self._deadlines, (now + self.stale_after_s, region, "stale"))
+
+    def set_reporting_interval(self, interval_s):
+        """
+        Derive the stale/offline thresholds from the longest gap between a healthy
+        sensor's readings, so slower sampling doesn't make sensors flap to stale
+        """
+        stale_after_s = STALE_AFTER_INTERVALS * interval_s
+        offline_after_s = OFFLINE_AFTER_INTERVALS * interval_s
+        with self._lock:
+            if (stale_after_s, offline_after_s) == (self.stale_after_s, self.offline_after_s):
+                return
+            self.stale_after_s, self.offline_after_s = stale_after_s, offline_after_s
+            # Pending deadlines were computed from the old thresholds; replace them
+            self._deadlines = []
+            for region, state in self.status.items():
+                if state == "online":
+                    deadline = (self.last_seen[region] + stale_after_s, region, "stale")
+                else:
+                    deadline = (self.last_seen[region] + offline_after_s, region, "offline")
+                self._deadlines.append(deadline)
+            heapq.heapify(self._deadlines)
+
+    def unregister(self, region):
+        """Stop tracking a sensor (e.g. its station moved to another node)"""
+        with self._lock:
+            state = self.status.pop(region, None)
+            if state is None:
+                return
+            self.counts[state] -= 1
+            self.last_seen.pop(region, None)
+            self._last_values.pop(region, None)
+            self.stuck.pop(region, None)
+
+            self._forget_raw_drift(region)
+            average = self._average.pop(region, None)
+            river_sums = self._river_sums.get(self.river.get(region), {})
+            for param, value in (average or {}).items():
+                sums = river_sums.get(param)
+                if sums:
+                    sums[0] -= value
+                    sums[1] -= 1
+            for state_map in (self.river, self.last_calibration, self._offset, self._baseline,
+                              self._since_calibration, self.drift, self.drifting):
+                state_map.pop(region, None)
+
+    def observe(self, reading):
+        """Record a reading and annotate its metadata with sensor health and calibration date"""
+        region = reading["location"]["region"]
+        with self._lock:
+            # Only registered sensors are tracked, not stations rebalanced to another node
+            if region not in self.status:
+                return reading
+            now = self.clock()
+            self.last_seen[region] = now
+            heapq.heappush(self._deadlines, (now + self.stale_after_s, region, "stale"))
+            if self.status[region] != "online":
+                self._set_status(region, "online")
+
+            values = {param: data["value"] for param, data in reading["parameters"].items()}
+            self._update_flatline(region, values)
+            if self.river.get(region):
+                self._update_drift(region, values)
+
+            metadata = reading.get("metadata")
+            if metadata is not None:
+                # The first reported calibration date sticks until calibrate() is called
+                calibrated = self.last_calibration.setdefault(region, metadata.get("last_calibration"))
+                metadata["last_calibration"] = calibrated
+                metadata["sensor_health"] = self._health_label(region)
+        return reading
+
+    def check(self, now=None):
+        """Move sensors whose deadline has passed to stale/offline; returns the transitions"""
+        transitions = []
+        with self._lock:
+            now = now if now is not None else self.clock()
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, region, state = heapq.heappop(self._deadlines)
+                if region not in self.status:
+                    continue  # Unregistered since the deadline was pushed
+                threshold = self.stale_after_s if state == "stale" else self.offline_after_s
+                # Superseded by a newer reading, or the transition already happened
+                if self.last_seen[region] + threshold > now or self.status[region] == state:
+                    continue
+                if state == "stale" and self.status[region] == "offline":
+                    continue
+
+                self._set_status(region, state)
+                transitions.append((region, state))
+                if state == "stale":
+                    heapq.heappush(
+                        self._deadlines,
+                        (self.last_seen[region] + self.offline_after_s, region, "offline")
+                    )
+        return transitions
+
+    def calibrate(self, region, calibrated_at=None):
+        """Record a calibration and relearn the sensor's neighbour offset from scratch"""
+        with self._lock:
+            calibrated_at = calibrated_at or datetime.now(timezone.utc)
+            self.last_calibration[region] = calibrated_at.isoformat()
+            self._offset.pop(region, None)
+            self._baseline.pop(region, None)
+            self._forget_raw_drift(region)
+            self._since_calibration[region] = 0
+            self.drift.pop(region, None)
+            self.drifting.pop(region, None)
+
+    def _set_status(self, region, state):
+        self.counts[self.status[region]] -= 1
+        self.counts[state] += 1
+        self.status[region] = state
+
+    def _update_flatline(self, region, values):
+        last = self._last_values.setdefault(region, {})
+        stuck = []
+        for param, value in values.items():
+            if value in self.limits.get(param, ()):
+                last.pop(param, None)
+                continue
+            previous = last.get(param)
+            count = previous[1] + 1 if previous and previous[0] == value else 1
+            last[param] = (value, count)
+            if count >= self.flatline_readings:
+                stuck.append(param)
+
+        if stuck:
+            self.stuck[region] = stuck
+        else:
+            self.stuck.pop(region, None)
+
+    def _update_drift(self, region, values):
+        river_sums = self._river_sums.setdefault(self.river[region], {})
+        average = self._average.setdefault(region, {})
+        offset = self._offset.setdefault(region, {})
+        # Readings only count towards the baseline once the river has enough sensors
+        since = None
+        raw_drift = self._raw_drift.setdefault(region, {})
+
+        drift = {}
+        for param in DRIFT_THRESHOLDS:
+            if param not in values:
+                continue
+            value = values[param]
+            sums = river_sums.setdefault(param, [0.0, 0])
+
+            # Fast average of this sensor's own value, reflected in the river-wide sum
+            old = average.get(param)
+            new = value if old is None else old + 0.2 * (value - old)
+            average[param] = new
+            if old is None:
+                sums[1] += 1
+                sums[0] += new
+            else:
+                sums[0] += new - old
+
+            if sums[1] < MIN_RIVER_SENSORS:
+                continue
+            if since is None:
+                since = self._since_calibration.get(region, 0) + 1
+                self._since_calibration[region] = since
+            neighbour_mean = (sums[0] - new) / (sums[1] - 1)
+            current = new - neighbour_mean
+            smoothed = current if param not in offset else offset[param] + 0.05 * (current - offset[param])
+            offset[param] = smoothed
+
+            baseline = self._baseline.setdefault(region, {})
+            if since <= self.baseline_readings:
+                baseline[param] = smoothed
+                continue
+
+            # Measured drift = own drift + echo of every other sensor's drift. Taking off the
+            # river median removes the echo as long as most sensors are not drifting.
+            raw = smoothed - baseline.get(param, smoothed)
+            drifts = self._river_drifts.setdefault((self.river[region], param), [])
+            if param in raw_drift:
+                del drifts[bisect_left(drifts, raw_drift[param])]
+            insort(drifts, raw)
+            raw_drift[param] = raw
+            if len(drifts) < MIN_RIVER_SENSORS:
+                continue
+            middle = len(drifts) // 2
+            median = drifts[middle] if len(drifts) % 2 else (drifts[middle - 1] + drifts[middle]) / 2
+            drift[param] = round((raw - median) * (sums[1] - 1) / sums[1], 3) or 0.0  # no -0.0
+
+        if drift:
+            self.drift[region] = drift
+            drifting = [p for p, d in drift.items() if abs(d) > DRIFT_THRESHOLDS[p]]
+            if drifting:
+                self.drifting[region] = drifting
+            else:
+                self.drifting.pop(region, None)
+
+    def _forget_raw_drift(self, region):
+        """Drop a sensor's raw drifts from its river's sorted lists (caller holds _lock)"""
+        river = self.river.get(region)
+        for param, raw in self._raw_drift.pop(region, {}).items():
+            drifts = self._river_drifts.get((river, param))
+            if drifts:
+                del drifts[bisect_left(drifts, raw)]
+
+    def _health_label(self, region):
+        if region in self.stuck:
+            return "stuck"
+        if region in self.drifting:
+            return "drifting"
+        return "good"
+
+    def summary(self):
+        """Fleet-wide counts for /api/status"""
+        with self._lock:
+            return {
+                "online": self.counts["online"],
+                "stale": self.counts["stale"],
+                "offline": self.counts["offline"],
+                "flatlined": len(self.stuck),
+                "drifting": len(self.drifting)
+            }
+
+    def sensor_report(self, region):
+        """Health details for one sensor"""
+        with self._lock:
+            last_seen = self.last_seen.get(region)
+            return {
+                "status": self.status.get(region),
+                "health": self._health_label(region),
+                "last_seen": datetime.fromtimestamp(last_seen, timezone.utc).isoformat() if last_seen else None,
+                "last_calibration": self.last_calibration.get(region),
+                "river": self.river.get(region),
+                "stuck_parameters": self.stuck.get(region, []),
+                "drift": self.drift.get(region, {}),
+                "drifting_parameters": self.drifting.get(region, [])
+            }
@@ -0,0 +1,322 @@
+# Scatter-gather shard coordinator for the IoT Water Quality Monitoring Backend - SIH 2025
+# Keeps the list of backend nodes in the cluster and pushes every membership change to
+# all of them (POST /api/shard). Each node then rebalances its own stations on the hash
+# ring (see sharding.py). Read endpoints fan out to every node in parallel and are merged:
+# /api/sensors/latest, /api/sensors/alerts and /api/status.
+#
+# Nodes failing `evict_after` health checks in a row are removed and their stations move
+# to the remaining nodes. Merged responses list nodes that did not answer ("partial").
+#
+# Membership and epoch are saved to `state_path`, so a restarted coordinator resumes where
+# it left off. Pushes also carry a generation id; nodes accept any epoch from a new
+# generation (e.g. a coordinator whose state file was lost starts over from epoch 1).
+#
+# Usage: python shard_coordinator.py --local 3 --stations 1000     (spawns 3 local nodes)
+#        python enhanced_iot_backend.py --port 5001 --coordinator http://localhost:5000
+
+import argparse
+import atexit
+import logging
+import os
+import subprocess
+import sys
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+from flask import Flask, request, jsonify
+
+from async_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+class ShardCoordinator:
+    """Cluster membership, rebalancing pushes and parallel fan-out to backend nodes"""
+
+    def __init__(self, state_path=None, timeout=5.0, health_interval=5.0, evict_after=3):
+        self.state_path = state_path
+        self.timeout = timeout
+        self.health_interval = health_interval
+        self.evict_after = evict_after
+
+        self.nodes = []  # node base URLs, also used as node ids on the hash ring
+        self.epoch = 0
+        self.generation = uuid.uuid4().hex[:12]
+        self.failures = {}  # node -> consecutive failed health checks
+        self.session = requests.Session()
+        self.executor = ThreadPoolExecutor(max_workers=16)
+        self._lock = threading.Lock()
+        self._rebalance_lock = threading.Lock()  # Pushes go out in epoch order
+        self._health_thread = None
+
+        if state_path and os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.nodes, self.epoch, self.generation = state["nodes"], state["epoch"], state["generation"]
+            logger.info("Resumed cluster state: %s nodes at epoch %s", len(self.nodes), self.epoch)
+
+    def _save(self):
+        """Persist membership (called with _lock held after every change)"""
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"nodes": self.nodes, "epoch": self.epoch, "generation": self.generation}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def join(self, url):
+        """Add a node (or re-send a rejoining node its shard) and rebalance"""
+        url = url.rstrip("/")
+        with self._rebalance_lock:
+            with self._lock:
+                if url not in self.nodes:
+                    self.nodes.append(url)
+                    self.epoch += 1
+                    self._save()
+                self.failures[url] = 0
+            return self._push(self.nodes)
+
+    def leave(self, url):
+        """Remove a node and rebalance its stations onto the others"""
+        url = url.rstrip("/")
+        with self._rebalance_lock:
+            with self._lock:
+                if url not in self.nodes:
+                    return None
+                self.nodes.remove(url)
+                self.failures.pop(url, None)
+                self.epoch += 1
+                self._save()
+            # A node leaving gracefully is told too, so it stops serving its old stations
+            return self._push(self.nodes + [url])
+
+    def _push(self, targets):
+        with self._lock:
+            body = {"nodes": list(self.nodes), "epoch": self.epoch, "generation": self.generation}
+        results = self.scatter("POST", "/api/shard", targets=targets,
+                               json_for=lambda node: dict(body, node_id=node))
+        logger.info("Shard epoch %s pushed to %s nodes", body["epoch"], len(targets))
+        return {node: result.get("stations") if isinstance(result, dict) else None
+                for node, (status, result) in results.items()}
+
+    def scatter(self, method, path, params=None, targets=None, json_for=None):
+        """Send one request to every node in parallel: {node: (status, JSON body or error text)}"""
+        targets = list(self.nodes) if targets is None else targets
+
+        def call(node):
+            try:
+                response = self.session.request(
+                    method, f"{node}{path}", params=params,
+                    json=json_for(node) if json_for else None, timeout=self.timeout
+                )
+                return node, (response.status_code, response.json())
+            except (requests.RequestException, ValueError) as e:
+                return node, (None, str(e))
+
+        return dict(self.executor.map(call, targets))
+
+    def gather(self, path, params=None):
+        """Successful node responses plus the nodes that failed to answer"""
+        results = self.scatter("GET", path, params)
+        bodies = [body for status, body in results.values() if status == 200]
+        unavailable = sorted(node for node, (status, _) in results.items() if status != 200)
+        return bodies, unavailable
+
+    def check_health(self):
+        """
+        Probe every node's shard state: evict nodes that keep failing and re-send the
+        membership to nodes that missed a rebalance (e.g. restarted, or a push timed out)
+        """
+        evicted, behind = [], []
+        for node, (status, body) in self.scatter("GET", "/api/shard").items():
+            with self._lock:
+                self.failures[node] = 0 if status == 200 else self.failures.get(node, 0) + 1
+                failed = self.failures[node] >= self.evict_after
+                if status == 200 and (body.get("epoch"), body.get("generation")) != (self.epoch, self.generation):
+                    behind.append(node)
+            if failed:
+                logger.warning("Evicting node %s after %s failed health checks", node, self.evict_after)
+                self.leave(node)
+                evicted.append(node)
+        if behind:
+            with self._rebalance_lock:
+                self._push(behind)
+        return evicted
+
+    def start_health_checks(self):
+        if self._health_thread is None:
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            time.sleep(self.health_interval)
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error(f"Health check failed: {e}")
+
+def merge_latest(bodies):
+    """Union of every node's latest readings"""
+    data = {}
+    for body in bodies:
+        data.update(body.get("data", {}))
+    return data
+
+def merge_alerts(bodies):
+    """All nodes' alerts, sorted the way a single node sorts them"""
+    alerts = [alert for body in bodies for alert in body.get("alerts", [])]
+    alerts.sort(key=lambda x: (x["urgency"] == "high", -x["score"]))
+    return alerts
+
+def merge_status(bodies):
+    """Cluster-wide totals from every node's /api/status"""
+    sensor_health = {}
+    for body in bodies:
+        for key, value in body.get("sensor_health", {}).items():
+            sensor_health[key] = sensor_health.get(key, 0) + value
+    return {
+        "sensors_active": sum(body.get("sensors_active", 0) for body in bodies),
+        "total_sensors": sum(body.get("total_sensors", 0) for body in bodies),
+        "sensor_health": sensor_health,
+        "real_data_regions": sum(body.get("real_data_regions", 0) for body in bodies),
+        "simulated_regions": sum(body.get("simulated_regions", 0) for body in bodies),
+        "regions": [region for body in bodies for region in body.get("regions", [])],
+        "data_sources": {k: v for body in bodies for k, v in body.get("data_sources", {}).items()}
+    }
+
+def create_app(coordinator):
+    """Flask app serving the merged API and cluster membership endpoints"""
+    app = Flask(__name__)
+
+    def cluster_info(unavailable):
+        return {
+            "nodes_total": len(coordinator.nodes),
+            "unavailable_nodes": unavailable,
+            "partial": bool(unavailable)
+        }
+
+    def no_nodes():
+        return jsonify({"success": False, "error": "No nodes in the cluster"}), 503
+
+    @app.route('/api/sensors/latest', methods=['GET'])
+    def get_latest_readings():
+        """Merged latest readings; ?region= picks one station like a single node does"""
+        if not coordinator.nodes:
+            return no_nodes()
+        params = {"metadata": request.args.get('metadata', 'false')}
+        bodies, unavailable = coordinator.gather('/api/sensors/latest', params)
+        data = merge_latest(bodies)
+
+        region = request.args.get('region')
+        if region and region in data:
+            return jsonify({"success": True, "data": data[region], **cluster_info(unavailable)})
+        return jsonify({"success": True, "data": data, "count": len(data), **cluster_info(unavailable)})
+
+    @app.route('/api/sensors/alerts', methods=['GET'])
+    def get_alerts():
+        if not coordinator.nodes:
+            return no_nodes()
+        bodies, unavailable = coordinator.gather('/api/sensors/alerts', request.args.to_dict())
+        alerts = merge_alerts(bodies)
+        return jsonify({
+            "success": True,
+            "alerts": alerts,
+            "count": len(alerts),
+            "high_priority": len([a for a in alerts if a["urgency"] == "high"]),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            **cluster_info(unavailable)
+        })
+
+    @app.route('/api/status', methods=['GET'])
+    def get_system_status():
+        bodies, unavailable = coordinator.gather('/api/status')
+        return jsonify({
+            "status": "online" if bodies else "degraded",
+            **merge_status(bodies),
+            "last_update": datetime.now(timezone.utc).isoformat(),
+            "api_version": "2.0_enhanced",
+            "epoch": coordinator.epoch,
+            **cluster_info(unavailable)
+        })
+
+    @app.route('/api/ready', methods=['GET'])
+    def get_readiness():
+        ready = bool(coordinator.nodes)
+        return jsonify({"ready": ready, "nodes": len(coordinator.nodes)}), 200 if ready else 503
+
+    @app.route('/api/cluster', methods=['GET'])
+    def get_cluster():
+        """Membership and each node's shard (station count, epoch)"""
+        shards = coordinator.scatter("GET", "/api/shard")
+        return jsonify({
+            "epoch": coordinator.epoch,
+            "nodes": {
+                node: body if status == 200 else {"error": body, "failed_checks": coordinator.failures.get(node, 0)}
+                for node, (status, body) in shards.items()
+            }
+        })
+
+    @app.route('/api/cluster/join', methods=['POST'])
+    def join_cluster():
+        url = (request.json or {}).get("url")
+        if not url:
+            return jsonify({"success": False, "error": "url is required"}), 400
+        stations = coordinator.join(url)
+        if stations.get(url.rstrip("/")) is None:
+            # The node is a member now; it retries until it has accepted its shard
+            return jsonify({"success": False, "error": "Node did not accept its shard", "epoch": coordinator.epoch}), 502
+        return jsonify({"success": True, "epoch": coordinator.epoch, "stations": stations})
+
+    @app.route('/api/cluster/leave', methods=['POST'])
+    def leave_cluster():
+        url = (request.json or {}).get("url")
+        stations = coordinator.leave(url or "")
+        if stations is None:
+            return jsonify({"success": False, "error": "Unknown node"}), 404
+        return jsonify({"success": True, "epoch": coordinator.epoch, "stations": stations})
+
+    return app
+
+def spawn_local_nodes(count, first_port, coordinator_url, stations):
+    """Start backend nodes as local processes; they join the coordinator themselves"""
+    backend = os.path.join(os.path.dirname(os.path.abspath(__file__)), "enhanced_iot_backend.py")
+    processes = []
+    for port in range(first_port, first_port + count):
+        processes.append(subprocess.Popen(
+            [sys.executable, backend, "--port", str(port),
+             "--coordinator", coordinator_url, "--stations", str(stations)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+    atexit.register(lambda: [process.terminate() for process in processes])
+    return processes
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard coordinator for IoT backend nodes")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--nodes", default="", help="Comma-separated node URLs to start with")
+    parser.add_argument("--local", type=int, default=0, help="Spawn this many local nodes")
+    parser.add_argument("--first-node-port", type=int, default=5001)
+    parser.add_argument("--stations", type=int, default=0,
+                        help="Total stations for spawned nodes (CLUSTER_STATIONS)")
+    parser.add_argument("--health-interval", type=float, default=5.0)
+    parser.add_argument("--state", default="coordinator_state.json",
+                        help="File the cluster membership and epoch are kept in")
+    args = parser.parse_args()
+
+    setup_logging(level=logging.INFO)
+    coordinator = ShardCoordinator(args.state, health_interval=args.health_interval)
+    for url in filter(None, args.nodes.split(",")):
+        coordinator.join(url)
+    if args.local:
+        spawn_local_nodes(args.local, args.first_node_port, f"http://127.0.0.1:{args.port}", args.stations)
+    coordinator.start_health_checks()
+
+    create_app(coordinator).run(host='0.0.0.0', port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Station partitioning for the IoT Water Quality Monitoring Backend - SIH 2025
+# Splits the station fleet across backend nodes with consistent hashing, so each node
+# generates, ingests and transmits only its own shard.
+#
+# Stations are hashed by partition key rather than by name: the state plus a 0.5° grid
+# cell (roughly district-sized in Northeast India). Nearby stations therefore land on the
+# same node, which keeps neighbour sampling boosts and river drift checks node-local.
+# Every node gets `vnodes` points on the ring, so a join or leave moves about 1/N of the
+# keys and leaves the rest where they are.
+
+import hashlib
+import math
+from bisect import bisect_right
+
+# Grid cell size in degrees used as the district part of the partition key
+DISTRICT_CELL_DEG = 0.5
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+def partition_key(info, station_info=None):
+    """State/district key for a station's region info ({lat, lon, ...})"""
+    state = (station_info or {}).get("state", "NE")
+    cell_lat = math.floor(info["lat"] / DISTRICT_CELL_DEG)
+    cell_lon = math.floor(info["lon"] / DISTRICT_CELL_DEG)
+    return f"{state}/{cell_lat}:{cell_lon}"
+
+class HashRing:
+    """Consistent hash ring mapping partition keys to node ids"""
+
+    def __init__(self, nodes=(), vnodes=128):
+        self.vnodes = vnodes
+        self.nodes = set()
+        self._points = []  # sorted hash points
+        self._owners = []  # node id at the same index as _points
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        self._rebuild()
+
+    def remove(self, node):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        self._rebuild()
+
+    def _rebuild(self):
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(self.vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key):
+        """Node owning a partition key (None when the ring is empty)"""
+        if not self._points:
+            return None
+        index = bisect_right(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    def assign(self, stations, station_info=None):
+        """Map each station in {region: info} to its owning node"""
+        station_info = station_info or {}
+        return {
+            region: self.node_for(partition_key(info, station_info.get(region)))
+            for region, info in stations.items()
+        }
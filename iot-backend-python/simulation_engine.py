@@ -0,0 +1,261 @@
+# Deterministic simulation engine for the IoT Water Quality Monitoring Backend - SIH 2025
+# Generates reproducible sensor time series for load-testing the main backend and alert chain.
+#
+# - Every reading is drawn from its own RNG seeded by (seed, sensor, timestamp), so any
+#   sensor's series is reproducible from the seed alone, however the work is split up
+# - Diurnal, seasonal and monsoon patterns for Northeast India rivers
+# - Time-accelerated replay (e.g. a month of 15-minute readings in a few minutes)
+# - Sharding of stations across a process pool
+#
+# Usage: python simulation_engine.py --seed 42 --days 30 --step-minutes 15 --processes 4 --output sim.jsonl
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+
+# Indian Standard Time offset, used for local time-of-day effects
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+# Southwest monsoon over Northeast India, as day-of-year bounds (~1 June to ~30 September)
+MONSOON_START_DAY = 152
+MONSOON_END_DAY = 274
+
+def derive_seed(*parts):
+    """Derive an independent 64-bit seed from a root seed and stream identifiers"""
+    key = ":".join(str(part) for part in parts).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+def environmental_factors(timestamp):
+    """
+    Seasonal, monsoon and diurnal effects at a UTC timestamp.
+    Returns additive offsets (temperature, dissolved oxygen, pH) and multipliers
+    (turbidity, conductivity/TDS) to apply on top of a baseline reading.
+    """
+    local = timestamp + IST_OFFSET
+    day_of_year = local.timetuple().tm_yday
+    hour = local.hour + local.minute / 60
+
+    # Annual cycle: coolest mid-January, warmest mid-July
+    seasonal = math.sin(2 * math.pi * (day_of_year - 105) / 365)
+
+    # Monsoon intensity rises from 0 in June to a peak in late July and falls back by October
+    if MONSOON_START_DAY <= day_of_year <= MONSOON_END_DAY:
+        monsoon = math.sin(math.pi * (day_of_year - MONSOON_START_DAY) / (MONSOON_END_DAY - MONSOON_START_DAY))
+    else:
+        monsoon = 0.0
+
+    # Daily cycle peaking mid-afternoon (15:00 local)
+    diurnal = math.sin(2 * math.pi * (hour - 9) / 24)
+
+    temperature_offset = 5.0 * seasonal + 1.5 * diurnal
+    return {
+        "temperature": temperature_offset,
+        # Warmer water holds less oxygen; photosynthesis lifts DO during the day
+        "dissolved_oxygen": -0.2 * temperature_offset + 0.5 * diurnal,
+        # Monsoon runoff carries sediment and slightly acidic rainwater, and dilutes dissolved solids
+        "ph": -0.2 * monsoon,
+        "turbidity": 1 + 2.5 * monsoon,
+        "conductivity": 1 - 0.3 * monsoon,
+        "tds": 1 - 0.3 * monsoon
+    }
+
+def apply_environmental_patterns(simulator, reading, timestamp):
+    """Apply environmental_factors() to a reading in place and re-assess its status"""
+    factors = environmental_factors(timestamp)
+    for param, data in reading["parameters"].items():
+        if param not in factors:
+            continue
+        ranges = simulator.parameters[param]
+        if param in ("turbidity", "conductivity", "tds"):
+            value = data["value"] * factors[param]
+        else:
+            value = data["value"] + factors[param]
+        data["value"] = round(max(ranges["min"], min(ranges["max"], value)), 2)
+
+    reading["status"] = simulator.assess_water_quality(reading["parameters"])
+    reading["metadata"]["quality_score"] = reading["status"]["score"]
+    return reading
+
+def synthetic_stations(existing, total_stations, seed=42):
+    """Generated stations around Northeast India padding `existing` regions up to total_stations"""
+    rng = random.Random(seed)
+    stations = {}
+    for index in range(1, max(0, total_stations - len(existing)) + 1):
+        stations[f"Station_{index:05d}"] = {
+            "lat": round(rng.uniform(22.0, 28.5), 4),
+            "lon": round(rng.uniform(89.5, 97.5), 4),
+            "pollution_factor": round(rng.uniform(0.1, 0.7), 2),
+            "data_source": "simulated"
+        }
+    return stations
+
+def add_synthetic_stations(simulator, total_stations, seed=42):
+    """Pad the simulator with generated stations around Northeast India"""
+    for region, info in synthetic_stations(simulator.regions, total_stations, seed).items():
+        simulator.add_region(region, info["lat"], info["lon"], info["pollution_factor"])
+
+class SimulationEngine:
+    """
+    Seeded simulation engine wrapping an EnhancedWaterQualitySimulator
+    Produces reproducible, pattern-aware readings without touching live state
+    """
+
+    def __init__(self, simulator, seed=None):
+        self.simulator = simulator
+        self.seed = seed if seed is not None else random.getrandbits(64)
+
+    def sensor_rng(self, region, timestamp):
+        """RNG for one sensor at one instant, independent of every other reading"""
+        epoch = int(timestamp.timestamp())
+        return random.Random(derive_seed(self.seed, region, epoch))
+
+    def reading_at(self, region, timestamp):
+        """Generate the reading for a region at a UTC timestamp"""
+        reading = self.simulator.generate_reading(region, timestamp, self.sensor_rng(region, timestamp))
+        return apply_environmental_patterns(self.simulator, reading, timestamp)
+
+    def series(self, region, start, end, step):
+        """Readings for one region from start to end inclusive, every step"""
+        readings = []
+        timestamp = start
+        while timestamp <= end:
+            readings.append(self.reading_at(region, timestamp))
+            timestamp += step
+        return readings
+
+    def replay(self, start, end, step, speed=None, regions=None):
+        """
+        Yield readings for all (or the given) regions in time order.
+        With speed set, simulated time runs `speed` times faster than wall time
+        (speed=4320 replays 30 days in 10 minutes); otherwise runs flat out.
+        """
+        regions = list(regions or self.simulator.regions)
+        wall_start = time.monotonic()
+        timestamp = start
+        while timestamp <= end:
+            if speed:
+                # Pace against the start time rather than sleeping per step, so lag never accumulates
+                due = wall_start + (timestamp - start).total_seconds() / speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            for region in regions:
+                yield self.reading_at(region, timestamp)
+            timestamp += step
+
+    def run_sharded(self, start, end, step, processes=None, output_dir=None):
+        """
+        Generate series for every region across a process pool.
+        Regions are split round-robin into one shard per process. Returns {region: [readings]},
+        or, with output_dir, writes shard_<n>.jsonl files and returns {region: count}.
+        """
+        processes = processes or os.cpu_count() or 1
+        regions = list(self.simulator.regions)
+        shards = [regions[i::processes] for i in range(processes)]
+        tasks = [
+            (index, shard, start, end, step, output_dir)
+            for index, shard in enumerate(shards) if shard
+        ]
+
+        with multiprocessing.Pool(
+            processes=len(tasks),
+            initializer=_init_worker,
+            initargs=(self.simulator.get_state(), self.seed)
+        ) as pool:
+            results = pool.map(_run_shard, tasks)
+
+        merged = {}
+        for result in results:
+            merged.update(result)
+        return merged
+
+# Per-process engine, built once by _init_worker so state is transferred once per worker
+_worker_engine = None
+
+def _init_worker(state, seed):
+    """Pool initializer: rebuild the simulator from its state in the worker process"""
+    global _worker_engine
+    from enhanced_iot_backend import EnhancedWaterQualitySimulator
+    _worker_engine = SimulationEngine(EnhancedWaterQualitySimulator.from_state(state), seed)
+
+def _run_shard(task):
+    """Generate every series in one shard"""
+    index, regions, start, end, step, output_dir = task
+    if output_dir is None:
+        return {region: _worker_engine.series(region, start, end, step) for region in regions}
+
+    counts = {}
+    path = os.path.join(output_dir, f"shard_{index}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for region in regions:
+            readings = _worker_engine.series(region, start, end, step)
+            for reading in readings:
+                f.write(json.dumps(reading) + "\n")
+            counts[region] = len(readings)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic water quality simulation")
+    parser.add_argument("--seed", type=int, default=42, help="Root seed for all sensor streams")
+    parser.add_argument("--start", help="Start time, ISO 8601 UTC (default: --days before now)")
+    parser.add_argument("--days", type=float, default=30, help="Simulated period length in days")
+    parser.add_argument("--step-minutes", type=float, default=15, help="Interval between readings")
+    parser.add_argument("--stations", type=int, default=0, help="Pad with synthetic stations up to this count")
+    parser.add_argument("--processes", type=int, default=1, help="Shard stations across this many processes")
+    parser.add_argument("--speed", type=float, help="Replay speed-up over wall time (single process only)")
+    parser.add_argument("--output", help="JSONL file (or directory with --processes > 1)")
+    parser.add_argument("--transmit", action="store_true",
+                        help="Send replayed readings and alerts through the main backend transmitter")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import enhanced_iot_backend as backend
+
+    simulator = backend.EnhancedWaterQualitySimulator()
+    add_synthetic_stations(simulator, args.stations)
+    engine = SimulationEngine(simulator, args.seed)
+
+    step = timedelta(minutes=args.step_minutes)
+    if args.start:
+        start = datetime.fromisoformat(args.start).astimezone(timezone.utc)
+    else:
+        start = (datetime.now(timezone.utc) - timedelta(days=args.days)).replace(second=0, microsecond=0)
+    end = start + timedelta(days=args.days)
+
+    wall_start = time.perf_counter()
+    if args.processes > 1:
+        output_dir = args.output
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        results = engine.run_sharded(start, end, step, args.processes, output_dir)
+        total = sum(len(r) if isinstance(r, list) else r for r in results.values())
+    else:
+        out = open(args.output, "w", encoding="utf-8") if args.output else None
+        total = 0
+        try:
+            for reading in engine.replay(start, end, step, speed=args.speed):
+                total += 1
+                if out:
+                    out.write(json.dumps(reading) + "\n")
+                if args.transmit:
+                    backend.transmitter._send_to_main_backend(reading)
+                    if reading["status"]["alert"]:
+                        backend.transmitter._send_alert(reading)
+        finally:
+            if out:
+                out.close()
+
+    elapsed = time.perf_counter() - wall_start
+    print(f"Simulated {total} readings for {len(simulator.regions)} stations "
+          f"({args.days:g} days, seed {args.seed}) in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} readings/s)")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,17 @@
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
 import requests
 
+import alert_anchoring
+import enhanced_iot_backend
+from alert_anchoring import AlertAnchor, verify_proof
+from sampling_scheduler import AdaptiveSamplingScheduler
+from scenario_injector import ScenarioInjector
+from sensor_health import SensorHealthTracker
+from simulation_engine import SimulationEngine
+
 BASE_URL = 'http://localhost:5000'
 
 def test_status():
@@ -9,6 +21,13 @@ def test_status():
     assert 'status' in data
     print("Status API OK")
 
+def test_ready():
+    response = requests.get(f'{BASE_URL}/api/ready')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['ready'] is True
+    print("Readiness API OK")
+
 def test_latest():
     response = requests.get(f'{BASE_URL}/api/sensors/latest')
     assert response.status_code == 200
@@ -23,9 +42,350 @@ def test_alerts():
     assert 'alerts' in data
     print("Alerts API OK")
 
+def test_metrics():
+    response = requests.get(f'{BASE_URL}/metrics')
+    assert response.status_code == 200
+    assert 'iot_http_request_duration_seconds' in response.text
+    print("Metrics endpoint OK")
+
+def test_shard():
+    response = requests.get(f'{BASE_URL}/api/shard')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['stations'] <= data['catalogue_stations']
+    print("Shard API OK")
+
+def test_series_reproducible_across_shards():
+    simulator = enhanced_iot_backend.get_simulator()
+    start = datetime(2025, 7, 1, tzinfo=timezone.utc)
+    end, step = start + timedelta(hours=6), timedelta(hours=1)
+    engine = SimulationEngine(simulator, seed=1234)
+    # Each sensor's series depends only on the seed, not on which process generates it
+    sharded = SimulationEngine(simulator, seed=1234).run_sharded(start, end, step, processes=3)
+    assert set(sharded) == set(simulator.regions)
+    for region, readings in sharded.items():
+        assert readings == engine.series(region, start, end, step)
+    assert SimulationEngine(simulator, seed=1235).series('Guwahati', start, end, step) != sharded['Guwahati']
+    print("Sharded series reproducibility OK")
+
+def test_historical_seed_is_reproducible():
+    simulator = enhanced_iot_backend.get_simulator()
+    client = enhanced_iot_backend.app.test_client()
+    first = client.get('/api/sensors/historical/Guwahati?seed=42').json
+    second = client.get('/api/sensors/historical/Guwahati?seed=42').json
+    assert first['count'] == 30
+    # Compare against the engine over the same window, so an hour rollover between calls can't flake
+    start = datetime.fromisoformat(first['data'][0]['timestamp'])
+    end = datetime.fromisoformat(first['data'][-1]['timestamp'])
+    expected = SimulationEngine(simulator, seed=42).series('Guwahati', start, end, timedelta(days=1))
+    assert first['data'] == expected
+    if second['data'][0]['timestamp'] == first['data'][0]['timestamp']:
+        assert second['data'] == first['data']
+    other = client.get('/api/sensors/historical/Guwahati?seed=43').json
+    assert other['data'] != first['data']
+    print("Historical seed reproducibility OK")
+
+def test_sensor_health():
+    response = requests.get(f'{BASE_URL}/api/sensors/health')
+    assert response.status_code == 200
+    data = response.json()
+    assert data['count'] == len(data['sensors'])
+    for report in data['sensors'].values():
+        assert report['status'] in ('online', 'stale', 'offline')
+        assert isinstance(report['stuck_parameters'], list)
+        assert isinstance(report['drifting_parameters'], list)
+    print("Sensor health API OK")
+
+def test_scenarios():
+    response = requests.get(f'{BASE_URL}/api/scenarios')
+    assert response.status_code == 200
+    assert 'do_crash' in response.json()['available']
+
+    # Names are looked up in the bundled list, never opened as paths
+    response = requests.post(f'{BASE_URL}/api/scenarios/start', json={'name': '../scenarios/do_crash'})
+    assert response.status_code == 400
+    response = requests.post(f'{BASE_URL}/api/scenarios/start',
+                             json={'scenario': {'time_scale': 0, 'events': [{'id': 'x', 'type': 'dropout'}]}})
+    assert response.status_code == 400
+    for event in ({'id': [1], 'type': 'spike', 'parameter': 'ph', 'set': 9, 'all': True},
+                  {'id': 'x', 'type': 'dropout', 'regions': [[1]]},
+                  {'id': 'x', 'type': 'dropout', 'all': 'yes'}):
+        response = requests.post(f'{BASE_URL}/api/scenarios/start', json={'scenario': {'events': [event]}})
+        assert response.status_code == 400
+    print("Scenarios API OK")
+
+def test_config_rejects_bad_intervals():
+    before = requests.get(f'{BASE_URL}/api/config').json()
+    for body in ({'max_send_interval': 'x'}, {'min_send_interval': -5}, {'send_interval': None},
+                 {'min_send_interval': 20, 'max_send_interval': True}):
+        response = requests.post(f'{BASE_URL}/api/config', json=body)
+        assert response.status_code == 400
+    after = requests.get(f'{BASE_URL}/api/config').json()
+    for key in ('send_interval', 'min_send_interval', 'max_send_interval'):
+        assert after[key] == before[key]
+    print("Config validation OK")
+
+def test_stale_threshold_follows_sampling_interval():
+    now = [0.0]
+    tracker = SensorHealthTracker(clock=lambda: now[0])
+    tracker.register("A", "Brahmaputra")
+    tracker.set_reporting_interval(120)
+    for _ in range(5):
+        # A healthy station sampled every 120 s never goes stale
+        now[0] += 120
+        assert tracker.check() == []
+        tracker.observe(_river_reading("A", ph=7.0))
+    now[0] += 3 * 120
+    assert tracker.check() == [("A", "stale")]
+    print("Stale threshold OK")
+
+def test_scenario_counts_only_alerts_it_caused():
+    simulator = enhanced_iot_backend.get_simulator()
+    scenario = {"events": [{"id": "do_crash", "type": "spike", "parameter": "dissolved_oxygen",
+                            "set": 2.5, "regions": ["Guwahati", "Shillong"]}]}
+    injector = ScenarioInjector(scenario, simulator, clock=lambda: 100.0)
+    injector.start()
+    for region, already_alerting in (("Guwahati", True), ("Shillong", False)):
+        reading = simulator.generate_reading(region)
+        reading["status"]["alert"] = already_alerting
+        reading["status"]["critical_issues"] = ["Low dissolved oxygen: 4.0 mg/L"] if already_alerting else []
+        reading = injector.apply(reading)
+        assert reading["status"]["alert"]
+        injector.record_alert(reading, sent_at=105.0)
+    # Guwahati was already alerting on low oxygen: the injected crash is not a detection
+    assert injector.alerted == {("do_crash", "Shillong"): 5.0}
+    assert injector.report()["masked_readings"] == 1
+    print("Scenario alert attribution OK")
+
+def _river_reading(region, **values):
+    return {
+        "location": {"region": region, "station_info": {"river": "Brahmaputra"}},
+        "parameters": {param: {"value": value} for param, value in values.items()}
+    }
+
+def test_drift_blames_the_drifting_sensor():
+    # A reports alone for a while before its river neighbours register
+    tracker = SensorHealthTracker()
+    neighbours = ["B", "C", "D", "E", "F"]
+    tracker.register("A", "Brahmaputra")
+    for _ in range(25):
+        tracker.observe(_river_reading("A", ph=7.0))
+    for region in neighbours:
+        tracker.register(region, "Brahmaputra")
+    for step in range(200):
+        ph_a = 7.0 if step < 25 else 8.0
+        tracker.observe(_river_reading("A", ph=ph_a))
+        for region in neighbours:
+            tracker.observe(_river_reading(region, ph=7.0))
+    assert tracker.drifting.get("A") == ["ph"]
+    assert not any(region in tracker.drifting for region in neighbours)
+    print("Drift attribution OK")
+
+def test_drift_needs_three_sensors_to_attribute():
+    # With two sensors a drift in either looks the same from both sides: flag neither
+    for neighbours in (["B"], ["B", "C"]):
+        tracker = SensorHealthTracker()
+        for region in ["A"] + neighbours:
+            tracker.register(region, "Brahmaputra")
+        for step in range(200):
+            tracker.observe(_river_reading("A", ph=7.0 if step < 25 else 8.0))
+            for region in neighbours:
+                tracker.observe(_river_reading(region, ph=7.0))
+        expected = {"A": ["ph"]} if len(neighbours) > 1 else {}
+        assert tracker.drifting == expected
+    print("Drift attribution with few sensors OK")
+
+def test_flatline_ignores_clamped_values():
+    tracker = SensorHealthTracker(limits={"tds": (50, 300)})
+    tracker.register("A", "Brahmaputra")
+    tracker.register("B", "Brahmaputra")
+    for step in range(30):
+        # TDS pinned at the range floor, chlorine varying: a healthy sensor
+        tracker.observe(_river_reading("A", tds=50, chlorine=0.5 + step % 3 / 100))
+        tracker.observe(_river_reading("B", tds=120, chlorine=0.55))
+    assert "A" not in tracker.stuck
+    assert tracker.stuck.get("B") == ["tds", "chlorine"]
+    print("Flatline detection OK")
+
+def test_alert_proof_round_trip():
+    now = [1_000_000.0]
+    with tempfile.TemporaryDirectory() as storage_dir:
+        anchor = AlertAnchor(storage_dir, window_s=60, clock=lambda: now[0])
+        alert_ids = [anchor.add({"region": f"R{i}", "level": "poor"}) for i in range(5)]
+        assert anchor.proof(alert_ids[3])["status"] == "pending"
+        now[0] += 60
+        anchor.close_expired()
+        anchor.stop()
+
+        # A restarted anchor answers from the on-disk index
+        saved = enhanced_iot_backend.alert_anchor
+        enhanced_iot_backend.alert_anchor = AlertAnchor(storage_dir, window_s=60)
+        try:
+            response = enhanced_iot_backend.app.test_client().get(f'/api/alerts/{alert_ids[3]}/proof')
+        finally:
+            enhanced_iot_backend.alert_anchor.stop()
+            enhanced_iot_backend.alert_anchor = saved
+    assert response.status_code == 200
+    data = response.json
+    assert verify_proof(alert_ids[3], data['proof'], data['root'])
+    assert not verify_proof(alert_ids[2], data['proof'], data['root'])
+    print("Alert proof round trip OK")
+
+def test_anchor_resubmits_without_duplicating_roots():
+    now = [1_000_000.0]
+    with tempfile.TemporaryDirectory() as storage_dir:
+        anchor = AlertAnchor(storage_dir, window_s=60, sink="local_chain", clock=lambda: now[0])
+        alert_id = anchor.add({"region": "Guwahati", "level": "poor"})
+        submit = anchor.sink.submit
+        # The block is written but the process dies before the receipt is recorded
+        def crash_after_submit(record):
+            submit(record)
+            raise OSError("killed")
+        anchor.sink.submit = crash_after_submit
+        try:
+            anchor.flush()
+        except OSError:
+            pass
+        assert anchor.stats()["unsubmitted_windows"] == 1
+        assert anchor.proof(alert_id)["status"] == "pending"
+
+        restarted = AlertAnchor(storage_dir, window_s=60, sink="local_chain")
+        restarted.flush()
+        data = restarted.proof(alert_id)
+        restarted.stop()
+        with open(f"{storage_dir}/chain.jsonl", encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
+    assert data["status"] == "anchored" and data["anchor"]["receipt"]["height"] == 1
+    assert verify_proof(alert_id, data["proof"], data["root"])
+    print("Anchor resubmission OK")
+
+def test_anchor_closer_survives_sink_errors():
+    saved_retry = alert_anchoring.RETRY_INITIAL_S
+    alert_anchoring.RETRY_INITIAL_S = 0.05
+    now = [1_000_000.0]
+    try:
+        with tempfile.TemporaryDirectory() as storage_dir:
+            anchor = AlertAnchor(storage_dir, window_s=60, clock=lambda: now[0])
+            failures = [2]
+            submit = anchor.sink.submit
+            def flaky_submit(record):
+                if failures[0]:
+                    failures[0] -= 1
+                    raise OSError("sink unavailable")
+                return submit(record)
+            anchor.sink.submit = flaky_submit
+            anchor.start()
+            alert_id = anchor.add({"region": "Kohima", "level": "poor"})
+            now[0] += 60
+            anchor.add({"region": "Kohima", "level": "fair"})  # Seals the first window
+            for _ in range(100):
+                if anchor.proof(alert_id)["status"] == "anchored":
+                    break
+                time.sleep(0.05)
+            stats = anchor.stats()
+            status = anchor.proof(alert_id)["status"]
+            anchor.stop()
+    finally:
+        alert_anchoring.RETRY_INITIAL_S = saved_retry
+    assert status == "anchored"
+    assert stats["failures"] == 2 and stats["last_error"] == "sink unavailable"
+    print("Anchor closer retry OK")
+
+def test_scheduler_does_not_drift():
+    now = [0.0]
+    scheduler = AdaptiveSamplingScheduler(base_interval=30, adaptive=False, clock=lambda: now[0])
+    scheduler.sync({"A": {"lat": 26.1, "lon": 91.7}})
+    first_due = scheduler.next_due()
+    for cycle in range(100):
+        # Each sample runs a few seconds late; the next one is still due on the grid
+        now[0] = first_due + cycle * 30 + cycle % 7
+        (region, due), = scheduler.pop_due()
+        assert due == first_due + cycle * 30
+        scheduler.observe(region, None, due)
+    # A station more than an interval behind skips the missed slots instead of bursting
+    now[0] = scheduler.next_due() + 95
+    (region, due), = scheduler.pop_due()
+    scheduler.observe(region, None, due)
+    assert scheduler.next_due() == now[0]
+    print("Scheduler drift OK")
+
+def test_scheduler_stretches_only_excellent_stations():
+    scheduler = AdaptiveSamplingScheduler(base_interval=30, min_interval=10, max_interval=60,
+                                          clock=lambda: 0.0)
+    scheduler.sync({"A": {"lat": 26.1, "lon": 91.7}, "B": {"lat": 10.0, "lon": 76.0}})
+    for level, alert in (("excellent", False), ("good", False), ("fair", True)):
+        for region in ("A", "B"):
+            reading = {"status": {"level": level, "score": 0.9, "alert": alert, "critical_issues": []}}
+            scheduler.observe(region, reading, scheduler.due[region], 0.0)
+            # Never sampled less often than the fixed loop unless the station is excellent
+            expected = 60 if level == "excellent" else 30
+            assert scheduler.interval[region] == expected, (level, scheduler.interval[region])
+    print("Scheduler interval bound OK")
+
+def test_liveness_needs_transmission():
+    simulator = enhanced_iot_backend.get_simulator()
+    client = enhanced_iot_backend.app.test_client()
+    assert not enhanced_iot_backend.transmitter.running
+    # Long after the last reading, unsampled sensors are not reported as failed
+    simulator.health.clock = lambda: time.time() + 3600
+    try:
+        data = client.get('/api/status').json
+    finally:
+        simulator.health.clock = time.time
+    assert data['liveness_monitored'] is False
+    assert data['sensors_active'] == data['total_sensors']
+    print("Liveness without transmission OK")
+
+def test_failed_pass_keeps_stations_scheduled():
+    transmitter = enhanced_iot_backend.EnhancedDataTransmitter()
+    stations = len(enhanced_iot_backend.get_simulator().regions)
+    far_future = time.time() + 3600
+    process_region = transmitter._process_region
+
+    # A station whose sampling raises is rescheduled like one that produced no reading
+    def failing_process(simulator, region):
+        if region == "Aizawl":
+            raise RuntimeError("sensor bus error")
+        return process_region(simulator, region)
+    transmitter._process_region = failing_process
+    assert transmitter.run_scheduled(far_future) == stations
+
+    # A pass that aborts partway puts the unprocessed stations back on the heap
+    observe = transmitter.scheduler.observe
+    def failing_observe(region, reading, due, now=None):
+        raise RuntimeError("scheduler failure")
+    transmitter.scheduler.observe = failing_observe
+    try:
+        transmitter.run_scheduled(far_future + 3600)
+    except RuntimeError:
+        pass
+    transmitter.scheduler.observe = observe
+    assert len(transmitter.scheduler.pop_due(far_future + 7200)) == stations
+    print("Failed pass rescheduling OK")
+
 if __name__ == '__main__':
     print("Running API Tests...")
     test_status()
+    test_ready()
     test_latest()
     test_alerts()
+    test_metrics()
+    test_shard()
+    test_series_reproducible_across_shards()
+    test_historical_seed_is_reproducible()
+    test_sensor_health()
+    test_scenarios()
+    test_config_rejects_bad_intervals()
+    test_scenario_counts_only_alerts_it_caused()
+    test_drift_blames_the_drifting_sensor()
+    test_drift_needs_three_sensors_to_attribute()
+    test_flatline_ignores_clamped_values()
+    test_stale_threshold_follows_sampling_interval()
+    test_alert_proof_round_trip()
+    test_anchor_resubmits_without_duplicating_roots()
+    test_anchor_closer_survives_sink_errors()
+    test_scheduler_does_not_drift()
+    test_scheduler_stretches_only_excellent_stations()
+    test_failed_pass_keeps_stations_scheduled()
+    test_liveness_needs_transmission()
     print("All tests passed.")